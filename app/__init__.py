@@ -22,16 +22,34 @@ def create_app(config_name=None):
             "DATABASE_URL", f"sqlite:///{os.path.join(app.root_path, '..', 'cras.db')}"
         ),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        UPLOAD_FOLDER=os.environ.get("UPLOAD_FOLDER", os.path.join(app.instance_path, "uploads")),
         ALLOWED_EXTENSIONS={"png", "jpg", "jpeg", "pdf", "bmp", "tiff"},
+        APPOINTMENTS_PAGE_SIZE=int(os.environ.get("APPOINTMENTS_PAGE_SIZE", 50)),
+        EXPORT_FOLDER=os.environ.get("EXPORT_FOLDER", os.path.join(app.instance_path, "exports")),
+        EXPORT_WORKERS=int(os.environ.get("EXPORT_WORKERS", 2)),
+        EXPORT_REUSE_SECONDS=int(os.environ.get("EXPORT_REUSE_SECONDS", 300)),
+        EXPORT_MAX_AGE=int(os.environ.get("EXPORT_MAX_AGE", 3600)),
+        EXPORT_MAX_BYTES=int(os.environ.get("EXPORT_MAX_BYTES", 500 * 1024 * 1024)),
+        OCR_WORKERS=int(os.environ.get("OCR_WORKERS", 2)),
+        OCR_MAX_PENDING=int(os.environ.get("OCR_MAX_PENDING", 20)),
+        OCR_WAIT_SECONDS=float(os.environ.get("OCR_WAIT_SECONDS", 5)),
+        OCR_TIMEOUT=float(os.environ.get("OCR_TIMEOUT", 30)),
+        OCR_MAX_BYTES=int(os.environ.get("OCR_MAX_BYTES", 10 * 1024 * 1024)),
+        OCR_MAX_SIDE=int(os.environ.get("OCR_MAX_SIDE", 2000)),
+        OCR_MAX_PAGES=int(os.environ.get("OCR_MAX_PAGES", 5)),
+        OCR_PDF_DPI=int(os.environ.get("OCR_PDF_DPI", 200)),
+        OCR_LANG=os.environ.get("OCR_LANG", "por"),
+        OCR_CACHE_ENTRIES=int(os.environ.get("OCR_CACHE_ENTRIES", 200)),
+        OCR_CACHE_BYTES=int(os.environ.get("OCR_CACHE_BYTES", 5 * 1024 * 1024)),
+        OCR_CACHE_SECONDS=float(os.environ.get("OCR_CACHE_SECONDS", 600)),
     )
 
     os.makedirs(app.instance_path, exist_ok=True)
-    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    from .search import include_object
+
+    migrate.init_app(app, db, include_object=include_object)
     csrf.init_app(app)
 
     from flask_wtf.csrf import CSRFError, generate_csrf
@@ -50,6 +68,12 @@ def create_app(config_name=None):
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "warning"
 
+    from .exports import ExportManager
+    from .ocr import OcrPool
+
+    ExportManager(app)
+    OcrPool(app)
+
     from . import routes  # noqa: F401  # Registers blueprints
 
     app.register_blueprint(routes.main_bp)
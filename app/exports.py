@@ -0,0 +1,322 @@
+"""Exportação de relatórios em segundo plano.
+
+Cada pedido de exportação (CSV ou PDF) vira um job num pool de threads, que lê
+os agendamentos em blocos e grava o arquivo em ``EXPORT_FOLDER``; a página do
+job acompanha o progresso e oferece o download ao final. Pedidos com os mesmos
+filtros e formato feitos em até ``EXPORT_REUSE_SECONDS`` segundos reaproveitam o
+job (em andamento ou concluído). Arquivos com mais de ``EXPORT_MAX_AGE``
+segundos são apagados, assim como os mais antigos quando o total passa de
+``EXPORT_MAX_BYTES``.
+
+Os jobs ficam na memória do processo: com vários processos do servidor, a página
+de progresso precisa ser atendida pelo mesmo processo que recebeu o pedido.
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from . import db
+from .models import Appointment
+
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+except ImportError:  # pragma: no cover - optional dependency
+    canvas = None
+
+CHUNK_ROWS = 1000
+
+FORMATS = {
+    "csv": ("text/csv", "relatorio_agendamentos.csv"),
+    "pdf": ("application/pdf", "relatorio_agendamentos.pdf"),
+}
+
+CSV_HEADER = [
+    "ID",
+    "Nome Completo",
+    "CPF",
+    "Data Nascimento",
+    "Telefone",
+    "Endereço",
+    "Bairro",
+    "CEP",
+    "Ponto de Referência",
+    "Motivo",
+    "Status",
+    "Cadastrador",
+    "Equipamento",
+    "Data Criação",
+    "Data Visita",
+]
+CSV_COLUMNS = (
+    Appointment.id,
+    Appointment.full_name,
+    Appointment.cpf,
+    Appointment.birth_date,
+    Appointment.phone,
+    Appointment.address,
+    Appointment.neighborhood,
+    Appointment.zipcode,
+    Appointment.reference_point,
+    Appointment.reason,
+    Appointment.status,
+    Appointment.registrant_name,
+    Appointment.equipment,
+    Appointment.created_at,
+    Appointment.visit_date,
+)
+PDF_COLUMNS = (Appointment.id, Appointment.full_name, Appointment.reason, Appointment.status)
+
+
+def pdf_available() -> bool:
+    return canvas is not None
+
+
+def stream_csv(rows, progress=None):
+    """Gera o CSV em blocos de ``CHUNK_ROWS`` linhas, lendo o banco aos poucos."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    yield buffer.getvalue().encode("utf-8")
+
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for count, row in enumerate(rows.yield_per(CHUNK_ROWS), start=1):
+        # Desempacotar a tupla é bem mais barato que ler cada atributo do Row.
+        (
+            appointment_id,
+            full_name,
+            cpf,
+            birth_date,
+            phone,
+            address,
+            neighborhood,
+            zipcode,
+            reference_point,
+            reason,
+            status,
+            registrant_name,
+            equipment,
+            created_at,
+            visit_date,
+        ) = row
+        writer.writerow(
+            [
+                appointment_id,
+                full_name,
+                cpf,
+                birth_date.strftime("%d/%m/%Y") if birth_date else "",
+                phone,
+                address,
+                neighborhood,
+                zipcode,
+                reference_point,
+                reason,
+                status.name,
+                registrant_name,
+                equipment,
+                created_at.strftime("%d/%m/%Y"),
+                visit_date.strftime("%d/%m/%Y") if visit_date else "",
+            ]
+        )
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            if progress:
+                progress(count)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+    if progress:
+        progress(count)
+
+
+def write_csv(rows, output, progress=None) -> None:
+    for chunk in stream_csv(rows, progress):
+        output.write(chunk)
+
+
+def write_pdf(rows, output, progress=None) -> None:
+    pdf = canvas.Canvas(output, pagesize=letter)
+    width, height = letter
+    y = height - 50
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(50, y, "Relatório de Agendamentos")
+    y -= 30
+    pdf.setFont("Helvetica", 10)
+    count = 0
+    for count, (appointment_id, full_name, reason, status) in enumerate(rows.yield_per(CHUNK_ROWS), start=1):
+        if y < 50:
+            pdf.showPage()
+            y = height - 50
+            pdf.setFont("Helvetica", 10)
+        pdf.drawString(50, y, f"#{appointment_id} - {full_name} - {reason} - {status.name}")
+        y -= 15
+        if progress and count % CHUNK_ROWS == 0:
+            progress(count)
+    pdf.save()
+    if progress:
+        progress(count)
+
+
+WRITERS = {"csv": (CSV_COLUMNS, write_csv), "pdf": (PDF_COLUMNS, write_pdf)}
+
+
+@dataclass
+class ExportJob:
+    id: str
+    format: str
+    key: str
+    status: str = "queued"  # queued, running, done, failed
+    rows: int = 0
+    total: int | None = None
+    path: str | None = None
+    size: int = 0
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def progress(self) -> int | None:
+        if self.status == "done":
+            return 100
+        if not self.total:
+            return None
+        return min(99, self.rows * 100 // self.total)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "status": self.status,
+            "rows": self.rows,
+            "total": self.total,
+            "progress": self.progress,
+            "size": self.size,
+            "error": self.error,
+        }
+
+
+class ExportManager:
+    def __init__(self, app):
+        self.app = app
+        self.folder = app.config["EXPORT_FOLDER"]
+        self.reuse_seconds = app.config["EXPORT_REUSE_SECONDS"]
+        self.max_age = app.config["EXPORT_MAX_AGE"]
+        self.max_bytes = app.config["EXPORT_MAX_BYTES"]
+        self.workers = app.config["EXPORT_WORKERS"]
+        self._executor: ThreadPoolExecutor | None = None
+        self._jobs: dict[str, ExportJob] = {}
+        self._by_key: dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        app.extensions["exports"] = self
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Criado na primeira exportação, para que comandos do manage.py e processos
+        # filhos que só chamam create_app() não criem threads nem mexam na pasta.
+        if self._executor is None:
+            os.makedirs(self.folder, exist_ok=True)
+            self._remove_orphans()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export")
+        return self._executor
+
+    def _remove_orphans(self) -> None:
+        """Apaga arquivos de execuções anteriores mais velhos que ``max_age``.
+
+        Arquivos recentes podem ser de outro processo (outro worker do gunicorn)
+        e ficam onde estão.
+        """
+        limit = time.time() - self.max_age
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def submit(self, format: str, filters: dict, build_query) -> ExportJob:
+        """Enfileira a exportação, ou devolve um job recente com os mesmos filtros.
+
+        ``build_query(query, filters)`` aplica os filtros do relatório à consulta.
+        """
+        filters = {name: value for name, value in filters.items() if value}
+        key = hashlib.sha256(json.dumps([format, filters], sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            self._evict()
+            job = self._by_key.get(key)
+            if job and (
+                job.status in ("queued", "running")
+                or (job.status == "done" and time.time() - job.finished_at < self.reuse_seconds)
+            ):
+                return job
+            job = ExportJob(id=secrets.token_urlsafe(12), format=format, key=key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            executor = self._pool()
+        executor.submit(self._run, job, filters, build_query)
+        return job
+
+    def get(self, job_id: str) -> ExportJob | None:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ExportJob, filters: dict, build_query) -> None:
+        columns, write = WRITERS[job.format]
+        path = os.path.join(self.folder, f"{job.id}.{job.format}")
+        with self.app.app_context():
+            job.status = "running"
+            try:
+                query = build_query(db.session.query(*columns), filters)
+                job.total = query.count()
+                with open(f"{path}.tmp", "wb") as output:
+                    write(query.order_by(Appointment.created_at.desc()), output, self._progress(job))
+                os.replace(f"{path}.tmp", path)
+            except Exception as exc:
+                self.app.logger.exception("Falha na exportação %s", job.id)
+                job.error = str(exc)
+                job.status = "failed"
+                try:
+                    os.remove(f"{path}.tmp")
+                except OSError:
+                    pass
+            else:
+                job.path = path
+                job.size = os.path.getsize(path)
+                job.status = "done"
+            finally:
+                job.finished_at = time.time()
+
+    @staticmethod
+    def _progress(job: ExportJob):
+        def update(rows: int) -> None:
+            job.rows = rows
+
+        return update
+
+    def _evict(self) -> None:
+        """Apaga os jobs expirados e, se preciso, os mais antigos até caber em ``max_bytes``."""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished_at), key=lambda job: job.finished_at)
+        total = sum(job.size for job in finished)
+        for job in finished:
+            if now - job.finished_at <= self.max_age and total <= self.max_bytes:
+                continue
+            total -= job.size
+            self._jobs.pop(job.id, None)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+            if job.path:
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
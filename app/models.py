@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
+from sqlalchemy import event, func, inspect
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_login import UserMixin
 
@@ -54,6 +55,16 @@ class AppointmentStatus(Enum):
 
 
 class Appointment(db.Model):
+    # Índices das consultas da lista, do relatório e dos filtros; ver "flask --app manage.py explain".
+    __table_args__ = (
+        db.Index("ix_appointment_created_at_id", "created_at", "id"),
+        db.Index("ix_appointment_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_appointment_reason_created_at", "reason", "created_at", "id"),
+        db.Index("ix_appointment_registrant_name", "registrant_name"),
+        db.Index("ix_appointment_equipment", "equipment"),
+        db.Index("ix_appointment_assigned_user_id", "assigned_user_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -68,13 +79,17 @@ class Appointment(db.Model):
     reference_point = db.Column(db.String(255))
     notes = db.Column(db.Text)
 
-    reason = db.Column(db.String(120), nullable=False)
+    # active_history: o valor anterior fica disponível para atualizar AppointmentStat.
+    reason = db.column_property(db.Column(db.String(120), nullable=False), active_history=True)
 
     equipment = db.Column(db.String(150))
     registrant_name = db.Column(db.String(150))
     registrant_cpf = db.Column(db.String(14))
 
-    status = db.Column(db.Enum(AppointmentStatus), default=AppointmentStatus.PENDING, nullable=False)
+    status = db.column_property(
+        db.Column(db.Enum(AppointmentStatus), default=AppointmentStatus.PENDING, nullable=False),
+        active_history=True,
+    )
 
     visit_date = db.Column(db.Date)
     visit_cadastrador = db.Column(db.String(150))
@@ -82,27 +97,122 @@ class Appointment(db.Model):
     assigned_user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     assigned_user = db.relationship("User", back_populates="appointments")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "full_name": self.full_name,
-            "cpf": self.cpf,
-            "birth_date": self.birth_date.isoformat() if self.birth_date else None,
-            "phone": self.phone,
-            "address": self.address,
-            "neighborhood": self.neighborhood,
-            "zipcode": self.zipcode,
-            "reference_point": self.reference_point,
-            "notes": self.notes,
-            "reason": self.reason,
-            "equipment": self.equipment,
-            "registrant_name": self.registrant_name,
-            "registrant_cpf": self.registrant_cpf,
-            "status": self.status.value,
-            "visit_date": self.visit_date.isoformat() if self.visit_date else None,
-            "visit_cadastrador": self.visit_cadastrador,
-            "assigned_user_id": self.assigned_user_id,
-            "assigned_user": self.assigned_user.full_name if self.assigned_user else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+    # Campos de to_dict(), na ordem em que aparecem.
+    FIELDS = (
+        "id",
+        "full_name",
+        "cpf",
+        "birth_date",
+        "phone",
+        "address",
+        "neighborhood",
+        "zipcode",
+        "reference_point",
+        "notes",
+        "reason",
+        "equipment",
+        "registrant_name",
+        "registrant_cpf",
+        "status",
+        "visit_date",
+        "visit_cadastrador",
+        "assigned_user_id",
+        "assigned_user",
+        "created_at",
+        "updated_at",
+    )
+
+    def to_dict(self, fields=None):
+        """Dicionário com ``fields`` (todos os de ``FIELDS`` por padrão); só lê os atributos pedidos."""
+        data = {}
+        for name in fields or self.FIELDS:
+            if name == "assigned_user":
+                data[name] = self.assigned_user.full_name if self.assigned_user else None
+                continue
+            value = getattr(self, name)
+            if isinstance(value, AppointmentStatus):
+                value = value.value
+            elif isinstance(value, date):
+                value = value.isoformat()
+            data[name] = value
+        return data
+
+
+class AppointmentStat(db.Model):
+    """Contagem de agendamentos por status e por motivo.
+
+    Mantida pelos eventos de inserção, alteração e exclusão de ``Appointment``,
+    na mesma transação que grava o agendamento. Operações em massa
+    (``query.update``/``query.delete``) não disparam esses eventos; depois delas,
+    ou ao criar a tabela num banco já populado, use ``flask --app manage.py
+    rebuild-stats``.
+    """
+
+    __tablename__ = "appointment_stat"
+
+    kind = db.Column(db.String(20), primary_key=True)
+    key = db.Column(db.String(120), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def rebuild(cls):
+        db.session.query(cls).delete()
+        rows = [
+            cls(kind="status", key=status.value, count=count)
+            for status, count in db.session.query(Appointment.status, func.count(Appointment.id)).group_by(
+                Appointment.status
+            )
+        ]
+        rows += [
+            cls(kind="reason", key=reason, count=count)
+            for reason, count in db.session.query(Appointment.reason, func.count(Appointment.id)).group_by(
+                Appointment.reason
+            )
+        ]
+        db.session.add_all(rows)
+        db.session.commit()
+        return len(rows)
+
+
+def _stat_keys(status, reason):
+    status = status or AppointmentStatus.PENDING
+    return [("status", status.value), ("reason", reason)]
+
+
+def _bump_stats(connection, keys, delta):
+    table = AppointmentStat.__table__
+    for kind, key in keys:
+        if key is None:
+            continue
+        result = connection.execute(
+            table.update()
+            .where(table.c.kind == kind, table.c.key == key)
+            .values(count=table.c.count + delta)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(kind=kind, key=key, count=delta))
+
+
+@event.listens_for(Appointment, "after_insert")
+def _count_inserted(mapper, connection, target):
+    _bump_stats(connection, _stat_keys(target.status, target.reason), 1)
+
+
+@event.listens_for(Appointment, "after_delete")
+def _count_deleted(mapper, connection, target):
+    _bump_stats(connection, _stat_keys(target.status, target.reason), -1)
+
+
+@event.listens_for(Appointment, "after_update")
+def _count_updated(mapper, connection, target):
+    state = inspect(target)
+    status = state.attrs.status.history
+    reason = state.attrs.reason.history
+    if not status.has_changes() and not reason.has_changes():
+        return
+    old_status = status.deleted[0] if status.deleted else target.status
+    old_reason = reason.deleted[0] if reason.deleted else target.reason
+    old = _stat_keys(old_status, old_reason)
+    new = _stat_keys(target.status, target.reason)
+    _bump_stats(connection, [key for key in old if key not in new], -1)
+    _bump_stats(connection, [key for key in new if key not in old], 1)
@@ -0,0 +1,317 @@
+"""OCR de documentos num pool de processos, fora das threads do servidor web.
+
+O arquivo enviado é lido direto da memória (sem arquivo temporário), reduzido
+para no máximo ``OCR_MAX_SIDE`` pixels no maior lado, convertido para tons de
+cinza e binarizado (limiar de Otsu) antes de ir para o Tesseract. PDFs são
+rasterizados uma página por vez com o ``pdf2image`` (opcional, requer o
+poppler), até ``OCR_MAX_PAGES`` páginas.
+
+Resultados ficam num cache em memória indexado pelo SHA-256 do arquivo e pelas
+configurações do OCR: reenviar o mesmo documento (por exemplo, depois de um erro
+de validação no formulário) não executa o Tesseract de novo. O cache descarta os
+itens menos usados acima de ``OCR_CACHE_ENTRIES`` itens ou ``OCR_CACHE_BYTES``
+bytes, e qualquer item depois de ``OCR_CACHE_SECONDS`` segundos, já que guarda
+dados pessoais.
+
+A rota espera o resultado por até ``OCR_WAIT_SECONDS`` segundos; se o OCR não
+terminar nesse prazo, devolve o ID do job para consulta posterior. Cada página
+tem no máximo ``OCR_TIMEOUT`` segundos de Tesseract, e no máximo
+``OCR_MAX_PENDING`` jobs ficam na fila ao mesmo tempo.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import datetime
+
+try:
+    import pytesseract
+    from PIL import Image, ImageOps, ImageSequence, UnidentifiedImageError
+except Exception:  # pragma: no cover - optional dependency
+    pytesseract = None
+    Image = None
+
+try:
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+except ImportError:  # pragma: no cover - optional dependency
+    convert_from_bytes = None
+
+# Jobs concluídos continuam consultáveis por este tempo (segundos).
+RESULT_SECONDS = 300
+
+
+class OcrError(Exception):
+    """Erro a ser mostrado ao usuário, com o status HTTP da resposta."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message, status)
+        self.message = message
+        self.status = status
+
+
+def available() -> bool:
+    return pytesseract is not None and Image is not None
+
+
+def pdf_available() -> bool:
+    return convert_from_bytes is not None
+
+
+def _otsu_threshold(histogram: list[int]) -> int:
+    total = sum(histogram)
+    weighted_total = sum(value * count for value, count in enumerate(histogram))
+    background = background_weighted = 0
+    best_threshold, best_variance = 127, -1.0
+    for value, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        background_weighted += value * count
+        mean_background = background_weighted / background
+        mean_foreground = (weighted_total - background_weighted) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = value, variance
+    return best_threshold
+
+
+def prepare(image, max_side: int):
+    """Reduz, converte para tons de cinza e binariza a imagem para o Tesseract."""
+    # Em JPEGs, draft() já decodifica numa escala menor.
+    image.draft("L", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    image = ImageOps.grayscale(image)
+    image.thumbnail((max_side, max_side))
+    threshold = _otsu_threshold(image.histogram())
+    return image.point(lambda value: 255 if value > threshold else 0, mode="1")
+
+
+def _pages(data: bytes, kind: str, max_pages: int, dpi: int):
+    if kind == "pdf":
+        try:
+            total = pdfinfo_from_bytes(data)["Pages"]
+        except Exception as exc:
+            raise OcrError(f"Não foi possível ler o PDF: {exc}") from exc
+        for number in range(1, min(total, max_pages) + 1):
+            yield from convert_from_bytes(data, dpi=dpi, first_page=number, last_page=number, grayscale=True)
+        return
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, OSError) as exc:
+        raise OcrError(f"Não foi possível ler o arquivo: {exc}") from exc
+    for number, frame in enumerate(ImageSequence.Iterator(image)):
+        if number >= max_pages:
+            break
+        yield frame
+
+
+def run(data: bytes, kind: str, settings: dict) -> dict:
+    """Executa o OCR (no processo do pool) e extrai os campos do formulário."""
+    texts = []
+    for page in _pages(data, kind, settings["max_pages"], settings["pdf_dpi"]):
+        try:
+            texts.append(
+                pytesseract.image_to_string(
+                    prepare(page, settings["max_side"]), lang=settings["lang"], timeout=settings["timeout"]
+                )
+            )
+        except pytesseract.TesseractNotFoundError as exc:
+            raise OcrError("Serviço de OCR indisponível no momento.", 500) from exc
+        except RuntimeError as exc:
+            # pytesseract sinaliza o tempo esgotado com RuntimeError.
+            raise OcrError("Tempo esgotado ao executar o OCR.", 504) from exc
+    text = "\n".join(texts)
+    return {"text": text, "fields": extract_fields(text)}
+
+
+def extract_fields(text: str) -> dict:
+    return {
+        "full_name": _extract_field(text, ["nome", "nome completo"]),
+        "cpf": _extract_cpf(text),
+        "birth_date": _extract_date(text),
+    }
+
+
+def _extract_field(text: str, keywords: list[str]):
+    lines = text.splitlines()
+    for line in lines:
+        for keyword in keywords:
+            if keyword.lower() in line.lower():
+                parts = line.split(":")
+                if len(parts) > 1:
+                    return parts[1].strip()
+                return line.replace(keyword, "", 1).strip()
+    return None
+
+
+def _extract_cpf(text: str):
+    match = re.search(r"(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[-\s]?\d{2})", text)
+    return match.group(1) if match else None
+
+
+def _extract_date(text: str):
+    match = re.search(r"(\d{2}[\/.-]\d{2}[\/.-]\d{4})", text)
+    if match:
+        try:
+            return datetime.strptime(match.group(1), "%d/%m/%Y").date().isoformat()
+        except ValueError:
+            pass
+    return None
+
+
+class OcrCache:
+    """Cache LRU dos resultados do OCR, com limite de itens, de bytes e validade."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        # chave -> (resultado, tamanho, expira em), do menos para o mais usado.
+        self._entries: OrderedDict[str, tuple[dict, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data: bytes, kind: str, settings: dict) -> str:
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps([kind, settings], sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, result: dict) -> None:
+        size = len(json.dumps(result, ensure_ascii=False).encode())
+        if not self.max_entries or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, size, time.monotonic() + self.ttl)
+            self.bytes += size
+            now = time.monotonic()
+            for expired in [name for name, entry in self._entries.items() if entry[2] <= now]:
+                self._remove(expired)
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+
+@dataclass
+class OcrJob:
+    id: str
+    future: object
+    created_at: float = field(default_factory=time.time)
+
+    def result(self, timeout: float = 0) -> dict | None:
+        """Resultado do OCR, ou ``None`` se ainda não terminou em ``timeout`` segundos."""
+        try:
+            return self.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        except OcrError:
+            raise
+        except Exception as exc:
+            raise OcrError(f"Falha ao executar o OCR: {exc}", 500) from exc
+
+
+class OcrPool:
+    def __init__(self, app):
+        self.settings = {
+            "lang": app.config["OCR_LANG"],
+            "max_side": app.config["OCR_MAX_SIDE"],
+            "max_pages": app.config["OCR_MAX_PAGES"],
+            "pdf_dpi": app.config["OCR_PDF_DPI"],
+            "timeout": app.config["OCR_TIMEOUT"],
+        }
+        self.workers = app.config["OCR_WORKERS"]
+        self.max_pending = app.config["OCR_MAX_PENDING"]
+        self._executor: ProcessPoolExecutor | None = None
+        self.cache = OcrCache(
+            app.config["OCR_CACHE_ENTRIES"], app.config["OCR_CACHE_BYTES"], app.config["OCR_CACHE_SECONDS"]
+        )
+        self._jobs: dict[str, OcrJob] = {}
+        self._running: dict[str, OcrJob] = {}
+        self._lock = threading.Lock()
+        app.extensions["ocr"] = self
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Criado no primeiro uso; "spawn" evita copiar para o filho o estado das threads do servidor.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, data: bytes, kind: str) -> OcrJob:
+        if kind == "pdf" and not pdf_available():
+            raise OcrError("Leitura de PDF indisponível: instale o pdf2image e o poppler.", 500)
+        key = self.cache.key(data, kind, self.settings)
+        started = False
+        with self._lock:
+            self._evict()
+            # O mesmo arquivo enviado de novo enquanto o primeiro OCR roda espera por ele.
+            if key in self._running:
+                return self._running[key]
+            result = self.cache.get(key)
+            if result is not None:
+                future = Future()
+                future.set_result(result)
+                job = OcrJob(id=secrets.token_urlsafe(12), future=future)
+            else:
+                if sum(not job.future.done() for job in self._jobs.values()) >= self.max_pending:
+                    raise OcrError("Serviço de OCR ocupado. Tente novamente em instantes.", 503)
+                job = OcrJob(id=secrets.token_urlsafe(12), future=self._pool().submit(run, data, kind, self.settings))
+                self._running[key] = job
+                started = True
+            self._jobs[job.id] = job
+        if started:
+            # Fora do lock: se o future já terminou, o callback roda aqui mesmo e pega o lock.
+            job.future.add_done_callback(lambda future: self._finished(key, future))
+        return job
+
+    def _finished(self, key: str, future) -> None:
+        with self._lock:
+            self._running.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def get(self, job_id: str) -> OcrJob | None:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        limit = time.time() - RESULT_SECONDS
+        for job_id in [job.id for job in self._jobs.values() if job.future.done() and job.created_at < limit]:
+            del self._jobs[job_id]
@@ -1,7 +1,5 @@
-import csv
-import io
-import os
-from datetime import datetime
+import hashlib
+from datetime import datetime, timezone
 
 from flask import (
     Blueprint,
@@ -16,19 +14,11 @@ from flask import (
     url_for,
 )
 from flask_login import current_user, login_required, login_user, logout_user
-from sqlalchemy import func
-from werkzeug.utils import secure_filename
-
-from . import db
-from .models import Appointment, AppointmentStatus, Role, User
-
-try:
-    import pytesseract
-    from PIL import Image
-except Exception:  # pragma: no cover - optional dependency
-    pytesseract = None
-    Image = None
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, load_only
 
+from . import db, exports, ocr, search
+from .models import Appointment, AppointmentStat, AppointmentStatus, Role, User
 
 main_bp = Blueprint("main", __name__)
 auth_bp = Blueprint("auth", __name__)
@@ -69,6 +59,8 @@ def logout():
 @main_bp.before_request
 def require_login():
     if request.endpoint and request.blueprint == "main" and not current_user.is_authenticated:
+        if request.path.startswith("/api/"):
+            return jsonify({"error": "Autenticação necessária."}), 401
         return redirect(url_for("auth.login", next=request.url))
 
 
@@ -82,24 +74,22 @@ def require_admin():
 @main_bp.route("/")
 @login_required
 def dashboard():
-    total = Appointment.query.count()
-    pending = Appointment.query.filter_by(status=AppointmentStatus.PENDING).count()
-    confirmed = Appointment.query.filter_by(status=AppointmentStatus.CONFIRMED).count()
-    completed = Appointment.query.filter_by(status=AppointmentStatus.COMPLETED).count()
-
-    appointments_by_reason = (
-        db.session.query(Appointment.reason, func.count(Appointment.id))
-        .group_by(Appointment.reason)
-        .order_by(func.count(Appointment.id).desc())
-        .all()
+    counts = {"status": {}, "reason": {}}
+    for stat in AppointmentStat.query.all():
+        counts[stat.kind][stat.key] = stat.count
+
+    appointments_by_reason = sorted(
+        ((reason, count) for reason, count in counts["reason"].items() if count),
+        key=lambda item: item[1],
+        reverse=True,
     )
 
     return render_template(
         "dashboard.html",
-        total=total,
-        pending=pending,
-        confirmed=confirmed,
-        completed=completed,
+        total=sum(counts["status"].values()),
+        pending=counts["status"].get(AppointmentStatus.PENDING.value, 0),
+        confirmed=counts["status"].get(AppointmentStatus.CONFIRMED.value, 0),
+        completed=counts["status"].get(AppointmentStatus.COMPLETED.value, 0),
         appointments_by_reason=appointments_by_reason,
     )
 
@@ -107,31 +97,102 @@ def dashboard():
 @main_bp.route("/agendamentos")
 @login_required
 def appointments_list():
-    query = Appointment.query
+    query = db.session.query(
+        Appointment.id,
+        Appointment.full_name,
+        Appointment.cpf,
+        Appointment.reason,
+        Appointment.status,
+        Appointment.created_at,
+    )
+
+    query = _filter_appointments(query, request.args)
+
+    page_size = current_app.config["APPOINTMENTS_PAGE_SIZE"]
+    after = _parse_cursor(request.args.get("after"))
+    before = _parse_cursor(request.args.get("before"))
+    if before:
+        # Página anterior: percorre em ordem crescente a partir do cursor e inverte.
+        rows = (
+            query.filter(_after_cursor(before))
+            .order_by(Appointment.created_at.asc(), Appointment.id.asc())
+            .limit(page_size + 1)
+            .all()
+        )
+        has_prev, has_next = len(rows) > page_size, True
+        appointments = rows[:page_size][::-1]
+    else:
+        if after:
+            query = query.filter(_before_cursor(after))
+        rows = query.order_by(Appointment.created_at.desc(), Appointment.id.desc()).limit(page_size + 1).all()
+        has_prev, has_next = after is not None, len(rows) > page_size
+        appointments = rows[:page_size]
+
+    args = {key: value for key, value in request.args.items() if key not in ("after", "before")}
+    next_url = prev_url = None
+    if appointments and has_next:
+        next_url = url_for("main.appointments_list", **args, after=_format_cursor(appointments[-1]))
+    if appointments and has_prev:
+        prev_url = url_for("main.appointments_list", **args, before=_format_cursor(appointments[0]))
+
+    reasons = [row[0] for row in db.session.query(Appointment.reason).distinct().order_by(Appointment.reason)]
+    return render_template(
+        "appointments/list.html",
+        appointments=appointments,
+        reasons=reasons,
+        statuses=AppointmentStatus,
+        next_url=next_url,
+        prev_url=prev_url,
+        first_url=url_for("main.appointments_list", **args) if has_prev else None,
+    )
+
 
-    status = request.args.get("status")
-    reason = request.args.get("reason")
-    start_date = request.args.get("start_date")
-    end_date = request.args.get("end_date")
+def _filter_appointments(query, args):
+    """Filtros da lista de agendamentos (status, motivo e período de registro)."""
+    status = args.get("status")
+    reason = args.get("reason")
+    start_dt = _parse_iso_datetime(args.get("start_date"))
+    end_dt = _parse_iso_datetime(args.get("end_date"))
 
     if status and status in {item.value for item in AppointmentStatus}:
-        query = query.filter_by(status=AppointmentStatus(status))
+        query = query.filter(Appointment.status == AppointmentStatus(status))
     if reason:
-        query = query.filter_by(reason=reason)
-    start_dt = _parse_iso_datetime(start_date)
-    end_dt = _parse_iso_datetime(end_date)
+        query = query.filter(Appointment.reason == reason)
     if start_dt:
         query = query.filter(Appointment.created_at >= start_dt)
     if end_dt:
         query = query.filter(Appointment.created_at <= end_dt)
+    return query
 
-    appointments = query.order_by(Appointment.created_at.desc()).all()
-    reasons = sorted({appointment.reason for appointment in Appointment.query.all()})
-    return render_template(
-        "appointments/list.html",
-        appointments=appointments,
-        reasons=reasons,
-        statuses=AppointmentStatus,
+
+def _format_cursor(row) -> str:
+    return f"{row.created_at.isoformat()}_{row.id}"
+
+
+def _parse_cursor(value: str | None):
+    """Cursor ``<created_at ISO>_<id>`` da paginação; ``None`` se ausente ou inválido."""
+    if not value:
+        return None
+    created_at, _, appointment_id = value.rpartition("_")
+    created_at = _parse_iso_datetime(created_at)
+    if created_at is None or not appointment_id.isdigit():
+        return None
+    return created_at, int(appointment_id)
+
+
+def _before_cursor(cursor):
+    created_at, appointment_id = cursor
+    return or_(
+        Appointment.created_at < created_at,
+        and_(Appointment.created_at == created_at, Appointment.id < appointment_id),
+    )
+
+
+def _after_cursor(cursor):
+    created_at, appointment_id = cursor
+    return or_(
+        Appointment.created_at > created_at,
+        and_(Appointment.created_at == created_at, Appointment.id > appointment_id),
     )
 
 
@@ -154,6 +215,111 @@ def _parse_iso_datetime(value: str | None):
         return None
 
 
+API_MAX_LIMIT = 500
+
+
+@main_bp.route("/api/agendamentos")
+@login_required
+def api_appointments():
+    try:
+        fields = _api_fields(request.args.get("fields"))
+        limit = int(request.args.get("limit", current_app.config["APPOINTMENTS_PAGE_SIZE"]))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    limit = max(1, min(limit, API_MAX_LIMIT))
+    after = _parse_cursor(request.args.get("after"))
+    if request.args.get("after") and after is None:
+        return jsonify({"error": "Cursor inválido."}), 400
+
+    query = _filter_appointments(_api_query(fields), request.args)
+    query = search.filter_query(
+        query,
+        request.args.get("q"),
+        registrant_name=request.args.get("cadastrador"),
+        equipment=request.args.get("equipment"),
+    )
+    if after:
+        query = query.filter(_before_cursor(after))
+    appointments = query.order_by(Appointment.created_at.desc(), Appointment.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        next_cursor = _format_cursor(appointments[-1])
+
+    # Sem Last-Modified: o maior updated_at das linhas restantes não muda quando uma
+    # linha é excluída, e o cliente continuaria com ela. O ETag inclui os IDs.
+    return _conditional_json(
+        [request.query_string.decode(), *(_api_version(item, fields) for item in appointments)],
+        None,
+        lambda: {"items": [item.to_dict(fields) for item in appointments], "next_cursor": next_cursor},
+    )
+
+
+@main_bp.route("/api/agendamentos/<int:appointment_id>")
+@login_required
+def api_appointment(appointment_id):
+    try:
+        fields = _api_fields(request.args.get("fields"))
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    appointment = _api_query(fields).filter(Appointment.id == appointment_id).first()
+    if not appointment:
+        return jsonify({"error": "Agendamento não encontrado."}), 404
+    # Renomear o cadastrador não muda o updated_at do agendamento: com o nome no corpo,
+    # só o ETag (que o inclui) decide.
+    return _conditional_json(
+        [request.query_string.decode(), _api_version(appointment, fields)],
+        None if "assigned_user" in fields else appointment.updated_at,
+        lambda: appointment.to_dict(fields),
+    )
+
+
+def _api_version(appointment, fields):
+    """O que identifica a versão de ``appointment`` na resposta, inclusive o nome do cadastrador."""
+    if "assigned_user" not in fields:
+        return appointment.id, appointment.updated_at
+    user = appointment.assigned_user
+    return appointment.id, appointment.updated_at, user.full_name if user else None
+
+
+def _api_fields(value: str | None):
+    if not value:
+        return Appointment.FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in Appointment.FIELDS]
+    if unknown:
+        raise ValueError(f"Campos desconhecidos: {', '.join(unknown)}.")
+    return fields
+
+
+def _api_query(fields):
+    """Consulta que lê só as colunas de ``fields`` e o cadastrador responsável num único JOIN."""
+    columns = {"id", "created_at", "updated_at", *fields} - {"assigned_user"}
+    query = Appointment.query.options(load_only(*(getattr(Appointment, name) for name in columns)))
+    if "assigned_user" in fields:
+        query = query.options(joinedload(Appointment.assigned_user).load_only(User.full_name))
+    return query
+
+
+def _conditional_json(version, last_modified, build):
+    """Resposta JSON com ETag e, se houver, Last-Modified; devolve 304 sem montar o corpo se o cliente já o tem."""
+    etag = hashlib.sha1(repr(version).encode()).hexdigest()
+    if last_modified:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+    response = current_app.response_class(status=304) if not_modified else jsonify(build())
+    response.set_etag(etag)
+    if last_modified:
+        # Atribuir None gravaria a hora atual no cabeçalho.
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
 @main_bp.route("/agendamentos/novo", methods=["GET", "POST"])
 @login_required
 def appointment_new():
@@ -265,6 +431,7 @@ def reports():
 
     if request.method == "POST":
         filters = {
+            "q": request.form.get("q"),
             "start_date": request.form.get("start_date"),
             "end_date": request.form.get("end_date"),
             "reason": request.form.get("reason"),
@@ -274,6 +441,7 @@ def reports():
         }
     else:
         filters = {
+            "q": request.args.get("q"),
             "start_date": request.args.get("start_date"),
             "end_date": request.args.get("end_date"),
             "reason": request.args.get("reason"),
@@ -282,101 +450,19 @@ def reports():
             "export": request.args.get("export"),
         }
 
-    start_dt = _parse_iso_datetime(filters["start_date"])
-    end_dt = _parse_iso_datetime(filters["end_date"])
-    if start_dt:
-        query = query.filter(Appointment.created_at >= start_dt)
-    if end_dt:
-        query = query.filter(Appointment.created_at <= end_dt)
-    if filters["reason"] in reasons:
-        query = query.filter_by(reason=filters["reason"])
-    if filters["cadastrador"]:
-        query = query.filter(Appointment.registrant_name.ilike(f"%{filters['cadastrador']}%"))
-    if filters["equipment"]:
-        query = query.filter(Appointment.equipment.ilike(f"%{filters['equipment']}%"))
-
-    appointments = query.order_by(Appointment.created_at.desc()).all()
-
-    if filters.get("export") == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(
-            [
-                "ID",
-                "Nome Completo",
-                "CPF",
-                "Data Nascimento",
-                "Telefone",
-                "Endereço",
-                "Bairro",
-                "CEP",
-                "Ponto de Referência",
-                "Motivo",
-                "Status",
-                "Cadastrador",
-                "Equipamento",
-                "Data Criação",
-                "Data Visita",
-            ]
-        )
-        for appt in appointments:
-            writer.writerow(
-                [
-                    appt.id,
-                    appt.full_name,
-                    appt.cpf,
-                    appt.birth_date.strftime("%d/%m/%Y") if appt.birth_date else "",
-                    appt.phone,
-                    appt.address,
-                    appt.neighborhood,
-                    appt.zipcode,
-                    appt.reference_point,
-                    appt.reason,
-                    appt.status.name,
-                    appt.registrant_name,
-                    appt.equipment,
-                    appt.created_at.strftime("%d/%m/%Y"),
-                    appt.visit_date.strftime("%d/%m/%Y") if appt.visit_date else "",
-                ]
-            )
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode("utf-8")),
-            mimetype="text/csv",
-            as_attachment=True,
-            download_name="relatorio_agendamentos.csv",
+    export = filters.get("export")
+    if export == "pdf" and not exports.pdf_available():
+        flash("Biblioteca ReportLab não instalada para geração de PDF.", "danger")
+    elif export in exports.FORMATS:
+        job = current_app.extensions["exports"].submit(
+            export,
+            {name: value for name, value in filters.items() if name != "export"},
+            _filter_report,
         )
+        return redirect(url_for("main.export_status", job_id=job.id))
 
-    if filters.get("export") == "pdf":
-        try:
-            from reportlab.lib.pagesizes import letter
-            from reportlab.pdfgen import canvas
-        except ImportError:
-            flash("Biblioteca ReportLab não instalada para geração de PDF.", "danger")
-        else:
-            buffer = io.BytesIO()
-            pdf = canvas.Canvas(buffer, pagesize=letter)
-            width, height = letter
-            y = height - 50
-            pdf.setFont("Helvetica-Bold", 14)
-            pdf.drawString(50, y, "Relatório de Agendamentos")
-            y -= 30
-            pdf.setFont("Helvetica", 10)
-            for appt in appointments:
-                if y < 50:
-                    pdf.showPage()
-                    y = height - 50
-                    pdf.setFont("Helvetica", 10)
-                pdf.drawString(50, y, f"#{appt.id} - {appt.full_name} - {appt.reason} - {appt.status.name}")
-                y -= 15
-            pdf.save()
-            buffer.seek(0)
-            return send_file(
-                buffer,
-                mimetype="application/pdf",
-                as_attachment=True,
-                download_name="relatorio_agendamentos.pdf",
-            )
+    query = _filter_report(query, filters)
+    appointments = query.order_by(Appointment.created_at.desc()).all()
 
     cadastradores = [row[0] for row in db.session.query(Appointment.registrant_name).distinct() if row[0]]
     equipments = [row[0] for row in db.session.query(Appointment.equipment).distinct() if row[0]]
@@ -391,10 +477,57 @@ def reports():
     )
 
 
+@main_bp.route("/relatorios/exportacoes/<job_id>")
+@login_required
+def export_status(job_id):
+    job = current_app.extensions["exports"].get(job_id)
+    if not job:
+        flash("Exportação não encontrada ou expirada. Gere o relatório novamente.", "warning")
+        return redirect(url_for("main.reports"))
+    return render_template("reports_export.html", job=job)
+
+
+@main_bp.route("/relatorios/exportacoes/<job_id>/progresso")
+@login_required
+def export_progress(job_id):
+    job = current_app.extensions["exports"].get(job_id)
+    if not job:
+        return jsonify({"error": "Exportação não encontrada ou expirada."}), 404
+    return jsonify(job.to_dict())
+
+
+@main_bp.route("/relatorios/exportacoes/<job_id>/arquivo")
+@login_required
+def export_download(job_id):
+    job = current_app.extensions["exports"].get(job_id)
+    if not job or job.status != "done":
+        abort(404)
+    mimetype, download_name = exports.FORMATS[job.format]
+    return send_file(job.path, mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+
+def _filter_report(query, filters):
+    """Filtros do relatório (período de registro, motivo e busca textual por palavra)."""
+    start_dt = _parse_iso_datetime(filters.get("start_date"))
+    end_dt = _parse_iso_datetime(filters.get("end_date"))
+    if start_dt:
+        query = query.filter(Appointment.created_at >= start_dt)
+    if end_dt:
+        query = query.filter(Appointment.created_at <= end_dt)
+    if filters.get("reason") in _appointment_reasons():
+        query = query.filter(Appointment.reason == filters["reason"])
+    return search.filter_query(
+        query,
+        filters.get("q"),
+        registrant_name=filters.get("cadastrador"),
+        equipment=filters.get("equipment"),
+    )
+
+
 @main_bp.route("/configuracoes")
 @login_required
 def settings():
-    return render_template("settings.html")
+    return render_template("settings.html", ocr_cache=current_app.extensions["ocr"].cache.stats())
 
 
 @main_bp.route("/ocr", methods=["POST"])
@@ -411,64 +544,37 @@ def ocr_extract():
     if ext not in current_app.config["ALLOWED_EXTENSIONS"]:
         return jsonify({"error": "Formato não suportado."}), 400
 
-    filename = secure_filename(file.filename)
-    upload_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-    file.save(upload_path)
-
-    if not pytesseract or not Image:
+    if not ocr.available():
         return jsonify({"error": "Serviço de OCR indisponível no momento."}), 500
 
+    data = file.read(current_app.config["OCR_MAX_BYTES"] + 1)
+    if len(data) > current_app.config["OCR_MAX_BYTES"]:
+        return jsonify({"error": "Arquivo muito grande para o OCR."}), 413
+
     try:
-        image = Image.open(upload_path)
-    except Exception as exc:
-        return jsonify({"error": f"Não foi possível ler o arquivo: {exc}"}), 400
+        job = current_app.extensions["ocr"].submit(data, ext)
+    except ocr.OcrError as exc:
+        return jsonify({"error": exc.message}), exc.status
+    return _ocr_response(job, current_app.config["OCR_WAIT_SECONDS"])
+
+
+@main_bp.route("/ocr/<job_id>")
+@login_required
+def ocr_result(job_id):
+    job = current_app.extensions["ocr"].get(job_id)
+    if not job:
+        return jsonify({"error": "OCR não encontrado ou expirado."}), 404
+    return _ocr_response(job, 0)
+
 
+def _ocr_response(job, wait: float):
     try:
-        text = pytesseract.image_to_string(image, lang="por")
-    finally:
-        try:
-            os.remove(upload_path)
-        except OSError:
-            pass
-
-    extracted = {
-        "full_name": _extract_field(text, ["nome", "nome completo"]),
-        "cpf": _extract_cpf(text),
-        "birth_date": _extract_date(text),
-    }
-
-    return jsonify({"text": text, "fields": extracted})
-
-
-def _extract_field(text: str, keywords: list[str]):
-    lines = text.splitlines()
-    for line in lines:
-        for keyword in keywords:
-            if keyword.lower() in line.lower():
-                parts = line.split(":")
-                if len(parts) > 1:
-                    return parts[1].strip()
-                return line.replace(keyword, "", 1).strip()
-    return None
-
-
-def _extract_cpf(text: str):
-    import re
-
-    match = re.search(r"(\d{3}[\.\s]?\d{3}[\.\s]?\d{3}[-\s]?\d{2})", text)
-    return match.group(1) if match else None
-
-
-def _extract_date(text: str):
-    import re
-
-    match = re.search(r"(\d{2}[\/.-]\d{2}[\/.-]\d{4})", text)
-    if match:
-        try:
-            return datetime.strptime(match.group(1), "%d/%m/%Y").date().isoformat()
-        except ValueError:
-            pass
-    return None
+        result = job.result(wait)
+    except ocr.OcrError as exc:
+        return jsonify({"error": exc.message}), exc.status
+    if result is None:
+        return jsonify({"job_id": job.id, "status_url": url_for("main.ocr_result", job_id=job.id)}), 202
+    return jsonify(result)
 
 
 @admin_bp.route("/usuarios")
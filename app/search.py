@@ -0,0 +1,68 @@
+"""Busca textual de agendamentos com o FTS5 do SQLite.
+
+A tabela virtual ``appointment_fts`` indexa nome do beneficiário, cadastrador,
+equipamento, endereço e bairro, sem acentos e sem diferenciar maiúsculas. Ela é
+criada pela migração e mantida por gatilhos em ``appointment``, que também
+cobrem alterações feitas fora do ORM. Cada palavra digitada é buscada como
+prefixo ("jos" encontra "José"). Em outros bancos a busca volta a usar ``ILIKE``.
+"""
+import re
+
+import sqlalchemy as sa
+
+from . import db
+from .models import Appointment
+
+TABLE = "appointment_fts"
+COLUMNS = ("full_name", "registrant_name", "equipment", "address", "neighborhood")
+
+
+def available() -> bool:
+    return db.engine.dialect.name == "sqlite"
+
+
+def _terms(text: str | None) -> str:
+    # Só palavras entram na expressão: aspas e operadores do FTS5 são descartados.
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text or ""))
+
+
+def match_expression(text: str | None = None, **columns: str | None) -> str | None:
+    """Expressão ``MATCH``: ``text`` em todas as colunas, os demais valores na coluna indicada."""
+    parts = []
+    if terms := _terms(text):
+        parts.append(f"({terms})")
+    for column, value in columns.items():
+        if terms := _terms(value):
+            parts.append(f"{column} : ({terms})")
+    return " AND ".join(parts) or None
+
+
+def filter_query(query, text: str | None = None, **columns: str | None):
+    """Restringe ``query`` aos agendamentos que casam com a busca."""
+    if not available():
+        for column, value in [(None, text), *columns.items()]:
+            fields = COLUMNS if column is None else (column,)
+            for word in re.findall(r"\w+", value or ""):
+                query = query.filter(sa.or_(*(getattr(Appointment, field).ilike(f"%{word}%") for field in fields)))
+        return query
+
+    expression = match_expression(text, **columns)
+    if expression is None:
+        return query
+    matches = (
+        sa.select(sa.column("rowid"))
+        .select_from(sa.table(TABLE))
+        .where(sa.text(f"{TABLE} MATCH :expression").bindparams(expression=expression))
+    )
+    return query.filter(Appointment.id.in_(matches))
+
+
+def rebuild() -> None:
+    """Reconstrói o índice a partir da tabela ``appointment``."""
+    db.session.execute(sa.text(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Esconde do autogenerate do Alembic a tabela virtual e as tabelas internas do FTS5."""
+    return not (type_ == "table" and name.startswith(TABLE))
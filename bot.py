@@ -1,253 +1,51 @@
 
-import os
+import functools
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters, ConversationHandler
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import secrets
+from telegram import Update
+from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters, ConversationHandler, TypeHandler
 from datetime import datetime
 
+from vocacional.config import Configuracao
+from vocacional.caixa_saida import CaixaSaida
+from vocacional.estatisticas import Estatisticas
+from vocacional.limitador import LimitadorEnvio
+from vocacional.metricas import MetricasBot, ServidorMetricas
+from vocacional.persistencia import PersistenciaSQLite
+from vocacional.processador import FilaLimitada, ProcessadorPorChat
+from vocacional.resultados import IndiceResultados
+from vocacional.planilha import DestinoPlanilha, GravadorResultados
+from vocacional.sessoes import EncerrarSessao, GerenciadorSessoes, SessaoExpirada
+from vocacional.questionario import QuestionarioInvalido, RepositorioQuestionario, carregar, ler_botao
+from vocacional.webhook import executar_webhook
+
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 NOME, EMAIL, TELEFONE, IDADE, TESTE = range(5)
+ESTADOS = {NOME: 'NOME', EMAIL: 'EMAIL', TELEFONE: 'TELEFONE', IDADE: 'IDADE', TESTE: 'TESTE'}
+PERGUNTAS_CADASTRO = {
+    NOME: "📝 Qual é o seu nome completo?",
+    EMAIL: "📧 Qual é o seu e-mail?",
+    TELEFONE: "📱 Qual é o seu telefone?",
+    IDADE: "🎂 Qual é a sua idade?",
+}
+# Dado do user_data gravado pelo estado anterior, sem o qual o estado não continua.
+DADOS_EXIGIDOS = {EMAIL: 'nome', TELEFONE: 'email', IDADE: 'telefone', TESTE: 'respostas'}
 
-PERGUNTAS = [
-    {
-        "numero": 1,
-        "pergunta": "Na escola você prefere/preferia assuntos ligados a:",
-        "opcoes": [
-            "a) Arte, esportes e atividades extracurriculares",
-            "b) Biologia e genética",
-            "c) Ciências humanas e idiomas",
-            "d) Ciências exatas"
-        ]
-    },
-    {
-        "numero": 2,
-        "pergunta": "Você prefere levar sua vida:",
-        "opcoes": [
-            "a) Com pouca rotina e poucas regras",
-            "b) Com regras e disciplinas",
-            "c) Interagindo com todo tipo de pessoa",
-            "d) Com muita autonomia: 'na sua'"
-        ]
-    },
-    {
-        "numero": 3,
-        "pergunta": "Você se descreveria como uma pessoa:",
-        "opcoes": [
-            "a) Impulsiva e um tanto aventureira",
-            "b) Cautelosa e responsável",
-            "c) Entusiasmada e muito amiga",
-            "d) Calma e diferente da maioria"
-        ]
-    },
-    {
-        "numero": 4,
-        "pergunta": "Você se considera uma pessoa:",
-        "opcoes": [
-            "a) Prática e hábil para improvisar",
-            "b) Batalhadora que sabe o que quer",
-            "c) Preocupada com questões humanas",
-            "d) Capacitada para criar e inventar"
-        ]
-    },
-    {
-        "numero": 5,
-        "pergunta": "De quais características você sente orgulho:",
-        "opcoes": [
-            "a) Audácia e facilidade para lidar com o inesperado",
-            "b) Senso de dever e capacidade de dar exemplo",
-            "c) Idealismo e disposição para compreender os outros",
-            "d) Engenhosidade e rapidez mental"
-        ]
-    },
-    {
-        "numero": 6,
-        "pergunta": "Costuma confiar mais em:",
-        "opcoes": [
-            "a) Percepção imediata",
-            "b) Costumes e tradições",
-            "c) Intuição",
-            "d) Razão e lógica"
-        ]
-    },
-    {
-        "numero": 7,
-        "pergunta": "Quase sempre você gosta de:",
-        "opcoes": [
-            "a) Causar impacto: os holofotes o atraem",
-            "b) Ser visto como um membro valioso de um grupo",
-            "c) Sonhar em transformar o mundo",
-            "d) Desvendar um enigma ou inventar algo útil"
-        ]
-    },
-    {
-        "numero": 8,
-        "pergunta": "A vida é mais interessante quando você tem:",
-        "opcoes": [
-            "a) Desafios e situações que mudam com o tempo",
-            "b) Segurança, emprego garantido, integração social",
-            "c) Possibilidade de fazer algo para mudar o mundo",
-            "d) Possibilidade de ir além do que já é conhecido"
-        ]
-    },
-    {
-        "numero": 9,
-        "pergunta": "Você gostaria de ser:",
-        "opcoes": [
-            "a) Um craque na profissão que escolher",
-            "b) Um executivo bem-sucedido",
-            "c) Um profissional de prestígio",
-            "d) Um especialista ou cientista"
-        ]
-    },
-    {
-        "numero": 10,
-        "pergunta": "Você é muito bom(boa) lidando com:",
-        "opcoes": [
-            "a) Ferramentas, instrumentos, equipamentos",
-            "b) Controle do tempo, comando e execução",
-            "c) Pessoas de todos os níveis culturais e sociais",
-            "d) Sistemas de construção (material ou mental)"
-        ]
-    },
-    {
-        "numero": 11,
-        "pergunta": "Antes de agir, você analisa:",
-        "opcoes": [
-            "a) Vantagens imediatas",
-            "b) Experiências já vividas",
-            "c) As possibilidades futuras",
-            "d) As condições e consequências"
-        ]
-    },
-    {
-        "numero": 12,
-        "pergunta": "Gosta quando as pessoas:",
-        "opcoes": [
-            "a) O surpreendem com um presente",
-            "b) Expressam gratidão por algo que fez",
-            "c) Reconhecem sua personalidade singular",
-            "d) Reconhecem sua inteligência"
-        ]
-    },
-    {
-        "numero": 13,
-        "pergunta": "Você costuma abraçar um novo projeto:",
-        "opcoes": [
-            "a) Com a cara e a coragem",
-            "b) Guiado pela experiência",
-            "c) Confiando na intuição e na criatividade",
-            "d) Depois de verificar todas as variáveis"
-        ]
-    },
-    {
-        "numero": 14,
-        "pergunta": "Geralmente você prefere agir:",
-        "opcoes": [
-            "a) No calor do momento",
-            "b) Com segurança e conforme o costume",
-            "c) Quando está inspirado",
-            "d) Quando um problema o desafia"
-        ]
-    },
-    {
-        "numero": 15,
-        "pergunta": "Você fica motivado(a) quando:",
-        "opcoes": [
-            "a) Tem a oportunidade de superar obstáculos",
-            "b) Experimenta estabilidade na vida profissional",
-            "c) Harmonia e inspiração guiam a atividade",
-            "d) Há liberdade para projetar o futuro"
-        ]
-    },
-    {
-        "numero": 16,
-        "pergunta": "Em atividades de grupos, você prefere:",
-        "opcoes": [
-            "a) As desafiadoras, que exigem ação rápida",
-            "b) Administrar os recursos disponíveis",
-            "c) Motivar as pessoas para darem o melhor de si",
-            "d) Descartar logo o que não funciona"
-        ]
-    },
-    {
-        "numero": 17,
-        "pergunta": "Liderar é uma atividade que gosta de exercer:",
-        "opcoes": [
-            "a) Por pouco tempo e dependendo da situação",
-            "b) Quando pode comandar do começo ao fim",
-            "c) Quando é preciso identificar e reunir talentos",
-            "d) Quando o raciocínio estratégico é necessário"
-        ]
-    },
-    {
-        "numero": 18,
-        "pergunta": "Em uma escola você gostaria de ser:",
-        "opcoes": [
-            "a) Professor de educação física",
-            "b) Diretor",
-            "c) Professor de literatura",
-            "d) Professor de matemática ou física"
-        ]
-    },
-    {
-        "numero": 19,
-        "pergunta": "É um elogio quando se referem a você como:",
-        "opcoes": [
-            "a) Corajoso, otimista e divertido",
-            "b) Cauteloso, responsável e aplicado",
-            "c) Harmonioso, íntegro e sábio",
-            "d) Uma mente brilhante"
-        ]
-    },
-    {
-        "numero": 20,
-        "pergunta": "Frases que têm a ver com você:",
-        "opcoes": [
-            "a) 'Deixo a vida me levar'",
-            "b) 'Manda quem pode, obedece quem tem juízo'",
-            "c) 'Para seu próprio interesse, seja verdadeiro'",
-            "d) 'Penso, logo existo'"
-        ]
-    }
-]
+def obter_questionario(context: ContextTypes.DEFAULT_TYPE):
+    """Versão do questionário em que o teste começou; ``None`` se ela não está mais disponível."""
+    return context.bot_data['questionarios'].obter(context.user_data.get('versao_questionario'))
 
-PERFIS = {
-    'A': {
-        'titulo': '🎯 PERFIL A - Dinâmico e Enérgico',
-        'descricao': 'A principal característica das pessoas do tipo A é sua energia e dinamismo. Elas têm predileção por atividades e novidades, demonstrando habilidades físicas e uma ótima comunicação corporal. Geralmente evitam a monotonia e encaram o trabalho como uma grande fonte de satisfação e alegria.',
-        'carreiras': ['Anestesista', 'Ator', 'Cineasta', 'Chefe de cozinha', 'Cirurgião', 'Coreógrafo', 'Dançarino', 'Dermatologista', 'Estilista', 'Esportista', 'Guia de turismo', 'Instrumentador cirúrgico', 'Jornalista', 'Médico clínico', 'Músico', 'Paisagista', 'Personal trainer', 'Personal stylist', 'Piloto', 'Publicitário', 'Roteirista']
-    },
-    'B': {
-        'titulo': '💼 PERFIL B - Organizado e Responsável',
-        'descricao': 'Comando e responsabilidades são duas palavras que definem as pessoas do tipo B. Elas gostam de lidar com fatos, quantidades, análises, organização e planejamento. O tipo B trabalha duro e prefere profissões que lhes proporcione status e possibilidade de crescimento.',
-        'carreiras': ['Administração', 'Advogado', 'Assistente social', 'Bibliotecário', 'Delegado', 'Engenheiro mecânico/químico', 'Juiz de direito', 'Pastor/Padre/Rabino', 'Policial', 'Promotor público', 'Defensor público']
-    },
-    'C': {
-        'titulo': '❤️ PERFIL C - Humanista e Intuitivo',
-        'descricao': 'Facilmente reconhecidos por seu entusiasmo e interesse nas relações humanas, as pessoas do tipo C têm a intuição como seu ponto forte. Muitas endereçam seus esforços e talentos para o desenvolvimento intelectual de alunos e colegas de trabalho.',
-        'carreiras': ['Artista plástico', 'Dramaturgo', 'Educador', 'Escritor', 'Filósofo', 'Jornalista', 'Pedagogo', 'Tradutor', 'Professor', 'Psicólogo', 'Psiquiatra', 'Sociólogo', 'Terapeuta ocupacional']
-    },
-    'D': {
-        'titulo': '🧠 PERFIL D - Analítico e Estratégico',
-        'descricao': 'São intuitivos, mas em vez de se preocupar com as pessoas, costumam focar seus interesses em grandes áreas do conhecimento como a ciência e tecnologia. Apresentam notável capacidade para identificar problemas concretos e resolvê-los, bem como para o raciocínio abstrato.',
-        'carreiras': ['Analista de sistemas', 'Antropólogo', 'Arquiteto', 'Astrônomo', 'Criador de software', 'Designer industrial', 'Economista', 'Engenheiro', 'Físico', 'CEO', 'Matemático', 'Militar', 'Oceanógrafo', 'Pesquisador', 'Químico', 'Maestro', 'Urbanista', 'Zoólogo']
-    }
-}
+async def versao_indisponivel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Encerra o teste cuja versão do questionário não existe mais, em vez de pontuá-lo com outra."""
+    await update.effective_message.reply_text(
+        "⚠️ A versão do questionário deste teste não está mais disponível. Use /start para começar de novo."
+    )
+    return ConversationHandler.END
 
-def conectar_google_sheets():
-    try:
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds = ServiceAccountCredentials.from_json_keyfile_name('credentials.json', scope)
-        client = gspread.authorize(creds)
-        sheet = client.open('Teste Vocacional - Respostas').sheet1
-        return sheet
-    except Exception as e:
-        logger.error(f"Erro ao conectar ao Google Sheets: {e}")
-        return None
+def mensagem_unica(context: ContextTypes.DEFAULT_TYPE) -> bool:
+    return context.bot_data['config'].modo_quiz != 'multipla'
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     mensagem_boas_vindas = (
@@ -263,32 +61,36 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         "📝 Qual é o seu nome completo?"
     )
     await update.message.reply_text(mensagem_boas_vindas, parse_mode='Markdown')
+    context.bot_data['metricas'].testes.inc(evento='iniciado')
     return NOME
 
 async def coletar_nome(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['nome'] = update.message.text
-    await update.message.reply_text("📧 Qual é o seu e-mail?", parse_mode='Markdown')
+    await update.message.reply_text(PERGUNTAS_CADASTRO[EMAIL], parse_mode='Markdown')
     return EMAIL
 
 async def coletar_email(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['email'] = update.message.text
-    await update.message.reply_text("📱 Qual é o seu telefone?", parse_mode='Markdown')
+    await update.message.reply_text(PERGUNTAS_CADASTRO[TELEFONE], parse_mode='Markdown')
     return TELEFONE
 
 async def coletar_telefone(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['telefone'] = update.message.text
-    await update.message.reply_text("🎂 Qual é a sua idade?", parse_mode='Markdown')
+    await update.message.reply_text(PERGUNTAS_CADASTRO[IDADE], parse_mode='Markdown')
     return IDADE
 
 async def coletar_idade(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    questionario = context.bot_data['questionarios'].atual
     context.user_data['idade'] = update.message.text
+    context.user_data['versao_questionario'] = questionario.versao
     context.user_data['respostas'] = {}
-    context.user_data['pontuacao'] = {'A': 0, 'B': 0, 'C': 0, 'D': 0}
     context.user_data['pergunta_atual'] = 0
+    context.user_data['sessao'] = secrets.token_hex(3)
+    context.bot_data['estatisticas'].iniciado()
     
     await update.message.reply_text(
         "✅ Ótimo! Agora vamos começar o teste.\n\n"
-        "São 20 perguntas. Para cada pergunta, escolha a alternativa que mais combina com você.\n\n"
+        f"São {questionario.total} perguntas. Para cada pergunta, escolha a alternativa que mais combina com você.\n\n"
         "Vamos lá! 🚀",
         parse_mode='Markdown'
     )
@@ -296,89 +98,93 @@ async def coletar_idade(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     return await enviar_pergunta(update, context)
 
 async def enviar_pergunta(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    questionario = obter_questionario(context)
+    if questionario is None:
+        return await versao_indisponivel(update, context)
     pergunta_num = context.user_data['pergunta_atual']
     
-    if pergunta_num >= len(PERGUNTAS):
+    if pergunta_num >= questionario.total:
         return await finalizar_teste(update, context)
     
-    pergunta = PERGUNTAS[pergunta_num]
-    
-    keyboard = []
-    for opcao in pergunta['opcoes']:
-        letra = opcao[0].upper()
-        keyboard.append([InlineKeyboardButton(opcao, callback_data=f"resp_{letra}")])
+    reply_markup = questionario.teclado(pergunta_num, context.user_data['sessao'])
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    
-    texto = f"Pergunta {pergunta['numero']}/20\n\n{pergunta['pergunta']}"
+    if mensagem_unica(context):
+        texto = questionario.textos_progresso[pergunta_num]
+    else:
+        texto = questionario.textos_pergunta[pergunta_num]
     
-    if update.callback_query:
+    if update.callback_query and mensagem_unica(context):
+        await update.callback_query.edit_message_text(texto, reply_markup=reply_markup, parse_mode='Markdown')
+    elif update.callback_query:
         await update.callback_query.message.reply_text(texto, reply_markup=reply_markup, parse_mode='Markdown')
     else:
         await update.message.reply_text(texto, reply_markup=reply_markup, parse_mode='Markdown')
     
     return TESTE
 
-async def processar_resposta(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+async def processar_resposta(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int | None:
     query = update.callback_query
     await query.answer()
     
-    resposta = query.data.split('_')[1]
+    sessao, pergunta, resposta = ler_botao(query.data or '')
     pergunta_num = context.user_data['pergunta_atual']
+    if sessao is None and 'sessao' not in context.user_data:
+        # Teste iniciado antes dos botões com sessão (formato "resp_A"): este clique vale
+        # e as próximas perguntas já saem com sessão. Nos demais, ela vem de coletar_idade.
+        sessao = context.user_data['sessao'] = secrets.token_hex(3)
+    if pergunta is None:
+        pergunta = pergunta_num
+    
+    questionario = obter_questionario(context)
+    if questionario is None:
+        return await versao_indisponivel(update, context)
+    # Clique repetido ou num teclado antigo: o estado da conversa não muda.
+    letras = questionario.pontuador.letras_opcoes
+    if (
+        sessao != context.user_data.get('sessao')
+        or pergunta != pergunta_num
+        or pergunta >= len(letras)
+        or resposta not in letras[pergunta]
+    ):
+        context.bot_data['metricas'].cliques_descartados.inc()
+        return None
     
     context.user_data['respostas'][pergunta_num] = resposta
-    context.user_data['pontuacao'][resposta] += 1
     context.user_data['pergunta_atual'] += 1
     
-    await query.edit_message_text(f"✅ Resposta registrada: {resposta}")
+    if not mensagem_unica(context):
+        await query.edit_message_text(f"✅ Resposta registrada: {resposta}")
     
     return await enviar_pergunta(update, context)
 
 async def finalizar_teste(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    pontuacao = context.user_data['pontuacao']
-    perfil_resultado = max(pontuacao, key=pontuacao.get)
-    
-    perfil = PERFIS[perfil_resultado]
-    
-    sheet = conectar_google_sheets()
-    if sheet:
-        try:
-            dados = [
-                datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
-                context.user_data['nome'],
-                context.user_data['email'],
-                context.user_data['telefone'],
-                context.user_data['idade'],
-                perfil_resultado,
-                pontuacao['A'],
-                pontuacao['B'],
-                pontuacao['C'],
-                pontuacao['D'],
-                ', '.join([f"Q{k+1}:{v}" for k, v in context.user_data['respostas'].items()])
-            ]
-            sheet.append_row(dados)
-        except Exception as e:
-            logger.error(f"Erro ao salvar no Google Sheets: {e}")
+    questionario = obter_questionario(context)
+    perfil_resultado, pontuacao = questionario.pontuador.resultado(context.user_data['respostas'])
+    data = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
     
-    resultado_msg = (
-        f"🎉 TESTE CONCLUÍDO! 🎉\n\n"
-        f"{perfil['titulo']}\n\n"
-        f"📊 Sua pontuação:\n"
-        f"A: {pontuacao['A']} | B: {pontuacao['B']} | C: {pontuacao['C']} | D: {pontuacao['D']}\n\n"
-        f"📝 Descrição do seu perfil:\n{perfil['descricao']}\n\n"
-        f"💼 Carreiras sugeridas:\n"
+    dados = [
+        data,
+        context.user_data['nome'],
+        context.user_data['email'],
+        context.user_data['telefone'],
+        context.user_data['idade'],
+        perfil_resultado,
+        *[pontuacao[letra] for letra in questionario.letras],
+        questionario.pontuador.compactar(context.user_data['respostas']),
+        update.effective_user.id,
+    ]
+    await context.bot_data['gravador'].enfileirar(dados)
+    context.bot_data['resultados'].registrar(
+        update.effective_user.id, data, perfil_resultado, pontuacao, questionario.versao
     )
+    context.bot_data['metricas'].testes.inc(evento='concluido')
+    context.bot_data['estatisticas'].concluido(perfil_resultado)
     
-    for i, carreira in enumerate(perfil['carreiras'], 1):
-        resultado_msg += f"{i}. {carreira}\n"
+    resultado_msg = questionario.texto_resultado(perfil_resultado, pontuacao)
     
-    resultado_msg += (
-        f"\n✨ Lembre-se: Este é apenas um guia! Você pode explorar diferentes áreas "
-        f"e descobrir novos interesses ao longo da sua jornada profissional.\n\n"
-        f"Obrigado por participar! 🚀"
-    )
-    
-    if update.callback_query:
+    if update.callback_query and mensagem_unica(context):
+        await update.callback_query.edit_message_text(resultado_msg, parse_mode='Markdown')
+    elif update.callback_query:
         await update.callback_query.message.reply_text(resultado_msg, parse_mode='Markdown')
     else:
         await update.message.reply_text(resultado_msg, parse_mode='Markdown')
@@ -387,30 +193,216 @@ async def finalizar_teste(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def cancelar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     await update.message.reply_text("❌ Teste cancelado. Use /start para começar novamente.")
+    context.bot_data['metricas'].testes.inc(evento='cancelado')
     return ConversationHandler.END
 
-def main():
-    TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+async def retomar(update: Update, context: ContextTypes.DEFAULT_TYPE, estado: int) -> int | None:
+    """Lembra quem volta a um teste em andamento de onde parou."""
+    await update.message.reply_text("🔄 Você tem um teste em andamento e pode continuar de onde parou!")
+    if estado == TESTE:
+        return await enviar_pergunta(update, context)
+    await update.message.reply_text(PERGUNTAS_CADASTRO[estado], parse_mode='Markdown')
+    return None
+
+def retomar_em(estado: int):
+    """``retomar`` para um estado: o ConversationHandler não informa o estado atual ao handler."""
+    @functools.wraps(retomar)
+    async def handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int | None:
+        return await retomar(update, context, estado)
+    return handler
+
+async def sessao_expirada(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Encerra a conversa de quem volta depois de a sessão expirar."""
+    if update.callback_query:
+        await update.callback_query.answer()
+    await update.effective_message.reply_text("⌛ Sua sessão expirou por inatividade. Use /start para começar de novo.")
+    return ConversationHandler.END
+
+async def estatisticas(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if update.effective_user.id not in context.bot_data['config'].admins:
+        return
     
-    application = Application.builder().token(TOKEN).build()
+    resumo = context.bot_data['estatisticas'].resumo()
+    letras = context.bot_data['questionarios'].atual.letras
+    linhas = [f"📈 ESTATÍSTICAS ({resumo['dia']})"]
+    for titulo, contadores in (("Hoje", resumo['hoje']), ("Desde o início", resumo['total'])):
+        concluidos = contadores['concluidos']
+        perfis = ' | '.join(
+            f"{letra}: {contadores['perfis'].get(letra, 0)}"
+            + (f" ({contadores['perfis'].get(letra, 0) / concluidos:.0%})" if concluidos else "")
+            for letra in letras
+        )
+        linhas.append(
+            f"\n{titulo}:\n"
+            f"▶️ Iniciados: {contadores['iniciados']}\n"
+            f"✅ Concluídos: {concluidos}\n"
+            f"🧭 Perfis: {perfis}"
+        )
+    await update.message.reply_text('\n'.join(linhas))
+
+async def meu_resultado(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    resultado = context.bot_data['resultados'].obter(
+        update.effective_user.id, context.user_data.get('email'), context.user_data.get('telefone')
+    )
+    if resultado is None:
+        await update.message.reply_text(
+            "🔍 Ainda não encontrei nenhum resultado seu. Testes antigos só são encontrados se você "
+            "informar no cadastro o mesmo e-mail e telefone usados naquele teste. Use /start para fazer o teste!"
+        )
+        return
+    
+    questionario = context.bot_data['questionarios'].obter(resultado['versao'])
+    if questionario is None or resultado['perfil'] not in questionario.perfis:
+        await update.message.reply_text(
+            f"📋 Seu resultado de {resultado['data']} está registrado, mas a versão do questionário "
+            "usada naquele teste não está mais disponível para mostrá-lo. Use /start para fazer o teste de novo!"
+        )
+        return
+    texto = questionario.texto_resultado(resultado['perfil'], resultado['pontuacao'])
+    await update.message.reply_text(f"📋 Seu resultado de {resultado['data']}:\n\n{texto}", parse_mode='Markdown')
+
+async def responder_clique(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Responde cliques fora de um teste em andamento (concluído, cancelado ou expirado)."""
+    await update.callback_query.answer("⌛ Este teste não está mais em andamento. Use /start para começar de novo.")
+    context.bot_data['metricas'].cliques_descartados.inc()
+
+async def recarregar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    config = context.bot_data['config']
+    if update.effective_user.id not in config.admins:
+        return
+    
+    caminho = context.args[0] if context.args else config.questionario
+    try:
+        novo = carregar(caminho)
+        anterior = context.bot_data['questionarios'].trocar(novo)
+    except (OSError, QuestionarioInvalido) as e:
+        await update.message.reply_text(f"❌ Questionário não carregado: {e}")
+        return
+    
+    logger.info(f"Questionário trocado da versão {anterior.versao} para {novo.versao}")
+    await update.message.reply_text(
+        f"✅ Questionário versão {novo.versao} ativo ({novo.total} perguntas). "
+        f"Testes em andamento continuam na versão {anterior.versao}."
+    )
+
+async def iniciar_servicos(application: Application) -> None:
+    await application.bot_data['gravador'].iniciar()
+    await application.bot_data['sessoes'].iniciar()
+    await application.bot_data['estatisticas'].iniciar()
+    config = application.bot_data['config']
+    if config.metricas_porta:
+        servidor = ServidorMetricas(application.bot_data['metricas'].registro, config.metricas_host, config.metricas_porta)
+        await servidor.iniciar()
+        application.bot_data['servidor_metricas'] = servidor
+
+async def encerrar_servicos(application: Application) -> None:
+    await application.bot_data['sessoes'].parar()
+    await application.bot_data['estatisticas'].parar()
+    servidor = application.bot_data.pop('servidor_metricas', None)
+    if servidor is not None:
+        await servidor.parar()
+    gravador = application.bot_data['gravador']
+    await gravador.parar()
+    gravador.caixa.fechar()
+    application.bot_data['resultados'].fechar()
+
+def criar_aplicacao(config: Configuracao, destino=None) -> Application:
+    metricas = MetricasBot()
+    medir = metricas.instrumentar
+    limitador = LimitadorEnvio(
+        taxa_global=config.envio_taxa_global,
+        taxa_grupo=config.envio_grupo_por_minuto / 60,
+        tentativas=config.envio_tentativas,
+    )
+    fila = FilaLimitada(max(config.atualizacoes_pendentes, config.atualizacoes_concorrentes))
+    processador = ProcessadorPorChat(config.atualizacoes_concorrentes)
+    builder = (
+        Application.builder()
+        .token(config.token)
+        .persistence(PersistenciaSQLite(config.estado, update_interval=config.estado_intervalo))
+        .rate_limiter(limitador)
+        .update_queue(fila)
+        .concurrent_updates(processador)
+        .post_init(iniciar_servicos)
+        .post_shutdown(encerrar_servicos)
+    )
+    if config.api_url:
+        builder = builder.base_url(config.api_url)
+    application = builder.build()
     
+    application.bot_data['config'] = config
+    application.bot_data['metricas'] = metricas
+    application.bot_data['questionarios'] = RepositorioQuestionario(
+        carregar(config.questionario), config.versoes_questionario
+    )
+    application.bot_data['resultados'] = IndiceResultados(config.indice_resultados)
+    application.bot_data['estatisticas'] = Estatisticas(config.estatisticas, config.estatisticas_intervalo)
+    application.bot_data['gravador'] = GravadorResultados(
+        destino or DestinoPlanilha(config.credenciais, config.planilha),
+        tamanho_lote=config.lote_tamanho,
+        intervalo=config.lote_intervalo,
+        tentativas=config.lote_tentativas,
+        espera_inicial=config.lote_espera_inicial,
+        caixa=CaixaSaida(config.caixa_saida),
+        reenvio_intervalo=config.reenvio_intervalo,
+        metricas=metricas,
+    )
+    
+    estados = {
+        NOME: [MessageHandler(filters.TEXT & ~filters.COMMAND, medir(coletar_nome))],
+        EMAIL: [MessageHandler(filters.TEXT & ~filters.COMMAND, medir(coletar_email))],
+        TELEFONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, medir(coletar_telefone))],
+        IDADE: [MessageHandler(filters.TEXT & ~filters.COMMAND, medir(coletar_idade))],
+        TESTE: [CallbackQueryHandler(medir(processar_resposta))],
+    }
+    for estado, handlers in estados.items():
+        # Sem o dado que o estado exige, a sessão expirou e a conversa termina.
+        if estado in DADOS_EXIGIDOS:
+            handlers.insert(0, SessaoExpirada(application, DADOS_EXIGIDOS[estado], medir(sessao_expirada)))
+        # Antes de todos: encerra as conversas das sessões que o GerenciadorSessoes expira.
+        handlers.insert(0, EncerrarSessao())
+        if config.sessao_retomar:
+            handlers.append(CommandHandler('start', medir(retomar_em(estado))))
+            if estado == TESTE:
+                handlers.append(MessageHandler(filters.TEXT & ~filters.COMMAND, medir(retomar_em(estado))))
     conv_handler = ConversationHandler(
-        entry_points=[CommandHandler('start', start)],
-        states={
-            NOME: [MessageHandler(filters.TEXT & ~filters.COMMAND, coletar_nome)],
-            EMAIL: [MessageHandler(filters.TEXT & ~filters.COMMAND, coletar_email)],
-            TELEFONE: [MessageHandler(filters.TEXT & ~filters.COMMAND, coletar_telefone)],
-            IDADE: [MessageHandler(filters.TEXT & ~filters.COMMAND, coletar_idade)],
-            TESTE: [CallbackQueryHandler(processar_resposta)],
-        },
-        fallbacks=[CommandHandler('cancelar', cancelar)],
+        entry_points=[CommandHandler('start', medir(start))],
+        states=estados,
+        fallbacks=[CommandHandler('cancelar', medir(cancelar))],
+        name='teste_vocacional',
+        persistent=True,
     )
     
+    sessoes = GerenciadorSessoes(
+        application,
+        conv_handler,
+        ttl=config.sessao_ttl,
+        maximo=config.sessao_maximo,
+        intervalo=config.sessao_varredura,
+        processador=processador,
+    )
+    application.bot_data['sessoes'] = sessoes
+    application.add_handler(TypeHandler(Update, sessoes.registrar), group=-1)
     application.add_handler(conv_handler)
+    application.add_handler(CommandHandler('recarregar', medir(recarregar)))
+    application.add_handler(CommandHandler('meuresultado', medir(meu_resultado)))
+    application.add_handler(CommandHandler('estatisticas', medir(estatisticas)))
+    application.add_handler(CallbackQueryHandler(medir(responder_clique)))
+    metricas.acompanhar_conversas(application.persistence, conv_handler.name, ESTADOS)
+    metricas.acompanhar_envio(limitador, application.bot_data['gravador'])
+    metricas.acompanhar_atualizacoes(fila, processador)
+    metricas.acompanhar_sessoes(sessoes)
     
-    application.run_polling()
-
-if _name_ == '_main_':
-    main()
+    return application
 
+def main():
+    config = Configuracao.do_ambiente()
+    application = criar_aplicacao(config)
+    
+    if config.modo == 'webhook':
+        executar_webhook(application, config)
+    else:
+        application.run_polling()
 
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,134 @@
 import getpass
+import re
+from datetime import datetime
 
-from app import create_app, db
-from app.models import Role, User
+import sqlalchemy as sa
+from flask_migrate import stamp, upgrade
+
+from app import create_app, db, search
+from app.models import Appointment, AppointmentStat, AppointmentStatus, Role, User
 
 app = create_app()
 
+# Revisão que corresponde às tabelas criadas pelo antigo db.create_all().
+BASELINE_REVISION = "ea9baf40512b"
+
+
+def _upgrade_database():
+    tables = sa.inspect(db.engine).get_table_names()
+    if "appointment" in tables and "alembic_version" not in tables:
+        stamp(revision=BASELINE_REVISION)
+    upgrade()
+
 
 @app.cli.command("init-db")
 def init_db_command():
-    """Cria as tabelas do banco de dados."""
+    """Cria ou atualiza as tabelas do banco de dados (migrações do Flask-Migrate)."""
     with app.app_context():
-        db.create_all()
+        _upgrade_database()
     print("Banco de dados criado/atualizado.")
 
 
+def _explained_queries():
+    from app.routes import _appointment_reasons, _before_cursor, _filter_appointments, _filter_report
+
+    listing = db.session.query(
+        Appointment.id,
+        Appointment.full_name,
+        Appointment.cpf,
+        Appointment.reason,
+        Appointment.status,
+        Appointment.created_at,
+    )
+    newest = (Appointment.created_at.desc(), Appointment.id.desc())
+    page = app.config["APPOINTMENTS_PAGE_SIZE"] + 1
+    period = {"start_date": "2024-01-01T00:00", "end_date": "2024-12-31T23:59"}
+    reason = _appointment_reasons()[0]
+    return [
+        ("lista: primeira página", listing.order_by(*newest).limit(page)),
+        (
+            "lista: página seguinte",
+            listing.filter(_before_cursor((datetime(2024, 6, 1), 1000))).order_by(*newest).limit(page),
+        ),
+        (
+            "lista: status",
+            _filter_appointments(listing, {"status": AppointmentStatus.PENDING.value}).order_by(*newest).limit(page),
+        ),
+        ("lista: motivo", _filter_appointments(listing, {"reason": reason}).order_by(*newest).limit(page)),
+        (
+            "lista: status e período",
+            _filter_appointments(listing, {"status": AppointmentStatus.PENDING.value, **period})
+            .order_by(*newest)
+            .limit(page),
+        ),
+        ("lista: motivos", db.session.query(Appointment.reason).distinct().order_by(Appointment.reason)),
+        ("relatório: período", _filter_report(Appointment.query, period).order_by(Appointment.created_at.desc())),
+        (
+            "relatório: motivo e período",
+            _filter_report(Appointment.query, {"reason": reason, **period}).order_by(Appointment.created_at.desc()),
+        ),
+        (
+            "relatório: cadastrador",
+            _filter_report(Appointment.query, {"cadastrador": "maria"}).order_by(Appointment.created_at.desc()),
+        ),
+        (
+            "relatório: busca e período",
+            _filter_report(Appointment.query, {"q": "jose centro", **period}).order_by(Appointment.created_at.desc()),
+        ),
+        ("relatório: cadastradores", db.session.query(Appointment.registrant_name).distinct()),
+        ("relatório: equipamentos", db.session.query(Appointment.equipment).distinct()),
+        ("dashboard", AppointmentStat.query),
+        ("agendamentos do usuário", Appointment.query.filter(Appointment.assigned_user_id == 1)),
+    ]
+
+
+@app.cli.command("explain")
+def explain_command():
+    """Mostra o plano de execução das consultas das páginas de agendamentos."""
+    with app.app_context():
+        sqlite = db.engine.dialect.name == "sqlite"
+        prefix = "EXPLAIN QUERY PLAN" if sqlite else "EXPLAIN"
+        full_scans = []
+        for name, query in _explained_queries():
+            sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+            print(f"== {name}")
+            for row in db.session.execute(sa.text(f"{prefix} {sql}")):
+                detail = row[-1]
+                # Percorrer a tabela (ou um índice não coberto) sem LIMIT lê todos os agendamentos.
+                if (
+                    sqlite
+                    and re.match(r"SCAN appointment\b", detail)
+                    and "COVERING" not in detail
+                    and " LIMIT " not in str(sql)
+                ):
+                    full_scans.append(name)
+                    detail += "  <-- varredura completa"
+                print(f"   {detail}")
+        if full_scans:
+            print(f"\nConsultas com varredura completa: {', '.join(full_scans)}")
+        elif sqlite:
+            print("\nNenhuma consulta lê a tabela inteira.")
+
+
+@app.cli.command("rebuild-stats")
+def rebuild_stats_command():
+    """Recalcula as contagens do dashboard a partir dos agendamentos."""
+    with app.app_context():
+        rows = AppointmentStat.rebuild()
+    print(f"Estatísticas recalculadas ({rows} linhas).")
+
+
+@app.cli.command("rebuild-search")
+def rebuild_search_command():
+    """Reconstrói o índice da busca textual de agendamentos."""
+    with app.app_context():
+        if not search.available():
+            print("A busca textual usa o FTS5 e só é indexada no SQLite.")
+            return
+        search.rebuild()
+    print("Índice de busca reconstruído.")
+
+
 @app.cli.command("create-admin")
 def create_admin():
     """Cria um usuário administrador interativo."""
@@ -41,5 +156,5 @@ def create_admin():
 
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        _upgrade_database()
         print("Banco de dados atualizado.")
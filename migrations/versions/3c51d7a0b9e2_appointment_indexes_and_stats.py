@@ -0,0 +1,55 @@
+"""appointment indexes and stats table
+
+Revision ID: 3c51d7a0b9e2
+Revises: ea9baf40512b
+Create Date: 2026-10-18 08:52:41.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c51d7a0b9e2'
+down_revision = 'ea9baf40512b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bancos criados pelo "init-db" depois da tabela de estatísticas já a têm.
+    if not sa.inspect(op.get_bind()).has_table('appointment_stat'):
+        op.create_table('appointment_stat',
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('key', sa.String(length=120), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'key')
+        )
+        op.execute(
+            "INSERT INTO appointment_stat (kind, key, count) "
+            "SELECT 'status', lower(status), count(*) FROM appointment GROUP BY status"
+        )
+        op.execute(
+            "INSERT INTO appointment_stat (kind, key, count) "
+            "SELECT 'reason', reason, count(*) FROM appointment GROUP BY reason"
+        )
+
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_assigned_user_id', ['assigned_user_id'], unique=False)
+        batch_op.create_index('ix_appointment_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_appointment_equipment', ['equipment'], unique=False)
+        batch_op.create_index('ix_appointment_reason_created_at', ['reason', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_appointment_registrant_name', ['registrant_name'], unique=False)
+        batch_op.create_index('ix_appointment_status_created_at', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_status_created_at')
+        batch_op.drop_index('ix_appointment_registrant_name')
+        batch_op.drop_index('ix_appointment_reason_created_at')
+        batch_op.drop_index('ix_appointment_equipment')
+        batch_op.drop_index('ix_appointment_created_at_id')
+        batch_op.drop_index('ix_appointment_assigned_user_id')
+
+    op.drop_table('appointment_stat')
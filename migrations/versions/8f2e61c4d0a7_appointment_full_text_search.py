@@ -0,0 +1,56 @@
+"""appointment full-text search
+
+Revision ID: 8f2e61c4d0a7
+Revises: 3c51d7a0b9e2
+Create Date: 2026-10-18 09:31:12.640215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2e61c4d0a7'
+down_revision = '3c51d7a0b9e2'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'full_name, registrant_name, equipment, address, neighborhood'
+NEW = 'new.full_name, new.registrant_name, new.equipment, new.address, new.neighborhood'
+OLD = 'old.full_name, old.registrant_name, old.equipment, old.address, old.neighborhood'
+
+
+def upgrade():
+    # FTS5 só existe no SQLite; nos demais bancos a busca usa ILIKE.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE appointment_fts USING fts5("
+        f"{COLUMNS}, content='appointment', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        f"CREATE TRIGGER appointment_fts_ai AFTER INSERT ON appointment BEGIN "
+        f"INSERT INTO appointment_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER appointment_fts_ad AFTER DELETE ON appointment BEGIN "
+        f"INSERT INTO appointment_fts(appointment_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER appointment_fts_au AFTER UPDATE OF {COLUMNS} ON appointment BEGIN "
+        f"INSERT INTO appointment_fts(appointment_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+        f"INSERT INTO appointment_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END"
+    )
+    op.execute("INSERT INTO appointment_fts(appointment_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS appointment_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS appointment_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS appointment_fts_ai')
+    op.execute('DROP TABLE IF EXISTS appointment_fts')
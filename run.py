@@ -1,7 +1,8 @@
 from app import create_app
 
-app = create_app()
-
+# Sem app no nível do módulo: os processos do OCR (spawn) reimportam este
+# arquivo, e cada um criaria a aplicação inteira. `flask --app run.py run`
+# encontra a fábrica create_app sozinho.
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    create_app().run(debug=True)
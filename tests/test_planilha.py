@@ -0,0 +1,133 @@
+"""GravadorResultados contra o destino falso em memória, sem rede."""
+import asyncio
+
+from vocacional import planilha
+from vocacional.caixa_saida import CaixaSaida
+from vocacional.planilha import DestinoMemoria, GravadorResultados
+
+
+class DestinoLotes(DestinoMemoria):
+    """DestinoMemoria que também guarda o tamanho de cada lote recebido."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lotes: list[int] = []
+
+    def enviar(self, linhas: list[list]) -> None:
+        super().enviar(linhas)
+        self.lotes.append(len(linhas))
+
+
+async def _esperar(condicao, tempo_limite: float = 2.0) -> None:
+    limite = asyncio.get_running_loop().time() + tempo_limite
+    while not condicao():
+        assert asyncio.get_running_loop().time() < limite, "condição não atingida a tempo"
+        await asyncio.sleep(0.01)
+
+
+def test_agrupa_linhas_em_lotes_de_tamanho_maximo():
+    destino = DestinoLotes()
+    gravador = GravadorResultados(destino, tamanho_lote=3, intervalo=10)
+
+    async def cenario():
+        await gravador.iniciar()
+        for numero in range(7):
+            await gravador.enfileirar([numero])
+        await _esperar(lambda: len(destino.linhas) >= 6)
+        await gravador.parar()
+
+    asyncio.run(cenario())
+    assert destino.lotes == [3, 3, 1]
+    assert destino.linhas == [[numero] for numero in range(7)]
+
+
+def test_envia_lote_incompleto_depois_do_intervalo():
+    destino = DestinoLotes()
+    gravador = GravadorResultados(destino, tamanho_lote=100, intervalo=0.05)
+
+    async def cenario():
+        await gravador.iniciar()
+        await gravador.enfileirar(['a'])
+        await gravador.enfileirar(['b'])
+        await _esperar(lambda: destino.linhas)
+        assert destino.lotes == [2]
+        await gravador.parar()
+
+    asyncio.run(cenario())
+
+
+def test_repete_com_espera_exponencial(monkeypatch):
+    destino = DestinoLotes(falhas=2)
+    gravador = GravadorResultados(destino, tamanho_lote=1, intervalo=0, tentativas=3, espera_inicial=0.5)
+    esperas = []
+    dormir = asyncio.sleep
+
+    async def registrar_espera(segundos):
+        esperas.append(segundos)
+        await dormir(0)
+
+    monkeypatch.setattr(planilha.asyncio, 'sleep', registrar_espera)
+
+    async def cenario():
+        await gravador.iniciar()
+        await gravador.enfileirar(['x'])
+        await gravador.parar()
+
+    asyncio.run(cenario())
+    assert esperas == [0.5, 1.0]
+    assert destino.chamadas == 3
+    assert destino.linhas == [['x']]
+
+
+def test_descarta_lote_sem_caixa_de_saida_apos_as_tentativas():
+    destino = DestinoLotes(falhas=5)
+    gravador = GravadorResultados(destino, tamanho_lote=1, intervalo=0, tentativas=2, espera_inicial=0)
+
+    async def cenario():
+        await gravador.iniciar()
+        await gravador.enfileirar(['x'])
+        await gravador.enfileirar(['y'])
+        await gravador.parar()
+
+    asyncio.run(cenario())
+    assert destino.linhas == []
+    assert destino.chamadas == 4
+
+
+def test_devolve_lote_a_fila_e_confirma_na_caixa_de_saida(tmp_path):
+    destino = DestinoLotes(falhas=2)
+    caixa = CaixaSaida(str(tmp_path / 'caixa.db'))
+    gravador = GravadorResultados(
+        destino, tamanho_lote=5, intervalo=0, tentativas=1, espera_inicial=0, caixa=caixa, reenvio_intervalo=0.05
+    )
+
+    async def cenario():
+        await gravador.iniciar()
+        await gravador.enfileirar(['x', 1])
+        await _esperar(lambda: destino.chamadas == 1)
+        assert [linha for _, linha in caixa.pendentes()] == [['x', 1]]
+        await _esperar(lambda: destino.linhas)
+        await gravador.parar()
+
+    asyncio.run(cenario())
+    assert destino.chamadas == 3
+    assert destino.linhas == [['x', 1]]
+    assert caixa.pendentes() == []
+    caixa.fechar()
+
+
+def test_reenvia_pendentes_da_caixa_ao_iniciar(tmp_path):
+    caixa = CaixaSaida(str(tmp_path / 'caixa.db'))
+    caixa.registrar(['antiga', 1])
+    caixa.registrar(['antiga', 2])
+    destino = DestinoLotes()
+    gravador = GravadorResultados(destino, tamanho_lote=10, intervalo=0.01, caixa=caixa)
+
+    async def cenario():
+        await gravador.iniciar()
+        await gravador.parar()
+
+    asyncio.run(cenario())
+    assert destino.linhas == [['antiga', 1], ['antiga', 2]]
+    assert caixa.pendentes() == []
+    caixa.fechar()
@@ -0,0 +1,51 @@
+"""Leitura do CSV da planilha com linhas curtas (recálculo e exportação colunar)."""
+import csv
+import logging
+
+from vocacional.exportacao import abrir, exportar
+from vocacional.pontuacao import coluna_respostas, ler_csv, main
+from vocacional.questionario import carregar
+
+QUESTIONARIO = carregar()
+PONTUADOR = QUESTIONARIO.pontuador
+
+
+def _linha_completa() -> list:
+    respostas = {indice: letras[0] for indice, letras in enumerate(PONTUADOR.letras_opcoes)}
+    perfil, pontuacao = PONTUADOR.resultado(respostas)
+    return [
+        '01/02/2024 10:00:00', 'Ana', 'ana@exemplo.com', '11999990000', '17', perfil,
+        *(str(pontuacao[letra]) for letra in PONTUADOR.perfis), PONTUADOR.compactar(respostas), '123',
+    ]
+
+
+def _gravar_csv(caminho) -> None:
+    cabecalho = ['Data', 'Nome', 'E-mail', 'Telefone', 'Idade', 'Perfil', *PONTUADOR.perfis, 'Respostas', 'ID']
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        csv.writer(arquivo).writerows([cabecalho, _linha_completa(), ['02/02/2024 11:00:00', 'Bia', 'bia@exemplo.com']])
+
+
+def test_ler_csv_ignora_linha_truncada(tmp_path, caplog):
+    caminho = tmp_path / 'resultados.csv'
+    _gravar_csv(caminho)
+    with caplog.at_level(logging.WARNING, logger='vocacional.pontuacao'):
+        cabecalho, linhas = ler_csv(str(caminho), coluna_respostas(PONTUADOR), PONTUADOR)
+    assert len(cabecalho) == 1
+    assert linhas == [_linha_completa()]
+    assert 'linha 3 ignorada' in caplog.text
+
+
+def test_recalculo_com_linha_truncada(tmp_path):
+    entrada, saida = tmp_path / 'resultados.csv', tmp_path / 'recalculado.csv'
+    _gravar_csv(entrada)
+    assert main([str(entrada), '-o', str(saida)]) == 0
+    with open(saida, newline='', encoding='utf-8') as arquivo:
+        assert len(list(csv.reader(arquivo))) == 2
+
+
+def test_exportar_conta_linha_truncada_como_ignorada(tmp_path):
+    linhas = [_linha_completa(), ['02/02/2024 11:00:00', 'Bia']]
+    manifesto = exportar(linhas, PONTUADOR, str(tmp_path / 'historico'), QUESTIONARIO.versao)
+    assert (manifesto['linhas'], manifesto['ignoradas']) == (1, 1)
+    _, colunas = abrir(str(tmp_path / 'historico'))
+    assert list(colunas['usuario']) == [123]
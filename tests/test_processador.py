@@ -0,0 +1,106 @@
+"""ProcessadorPorChat: ordem dentro de cada chat e paralelismo entre chats."""
+import asyncio
+import time
+from datetime import datetime
+
+from telegram import Chat, Message, Update
+
+from vocacional.processador import FilaLimitada, ProcessadorPorChat
+
+
+def _atualizacao(update_id: int, chat_id: int) -> Update:
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    return Update(update_id=update_id, message=Message(message_id=update_id, date=datetime.now(), chat=chat))
+
+
+class Registro:
+    def __init__(self):
+        self.ordem: dict[int, list[int]] = {}
+        self.ativos: dict[int, int] = {}
+        self.simultaneos_por_chat = 0
+        self.simultaneos = 0
+        self._total = 0
+
+    async def tratar(self, chat_id: int, numero: int, duracao: float) -> None:
+        self.ativos[chat_id] = self.ativos.get(chat_id, 0) + 1
+        self._total += 1
+        self.simultaneos_por_chat = max(self.simultaneos_por_chat, self.ativos[chat_id])
+        self.simultaneos = max(self.simultaneos, self._total)
+        await asyncio.sleep(duracao)
+        self.ordem.setdefault(chat_id, []).append(numero)
+        self.ativos[chat_id] -= 1
+        self._total -= 1
+
+
+async def _processar(
+    processador: ProcessadorPorChat, registro: Registro, chats: int, por_chat: int, duracao: float,
+    decrescente: bool = False,
+) -> float:
+    tarefas = []
+    inicio = time.perf_counter()
+    for numero in range(por_chat):
+        for chat_id in range(1, chats + 1):
+            atualizacao = _atualizacao(numero * chats + chat_id, chat_id)
+            coroutine = registro.tratar(chat_id, numero, duracao * (por_chat - numero) if decrescente else duracao)
+            tarefas.append(asyncio.create_task(processador.process_update(atualizacao, coroutine)))
+    await asyncio.gather(*tarefas)
+    return time.perf_counter() - inicio
+
+
+def test_atualizacoes_de_um_chat_em_ordem_e_uma_de_cada_vez():
+    registro = Registro()
+    processador = ProcessadorPorChat(16)
+    # Durações decrescentes: sem a trava do chat, as últimas terminariam primeiro.
+    asyncio.run(_processar(processador, registro, chats=4, por_chat=5, duracao=0.01, decrescente=True))
+    assert registro.simultaneos_por_chat == 1
+    assert all(ordem == list(range(5)) for ordem in registro.ordem.values())
+    assert processador.chats_ativos == 0
+
+
+def test_chats_diferentes_em_paralelo_ate_o_limite():
+    registro = Registro()
+    asyncio.run(_processar(ProcessadorPorChat(3), registro, chats=8, por_chat=2, duracao=0.01))
+    assert registro.simultaneos == 3
+    assert registro.simultaneos_por_chat == 1
+
+
+def test_vazao_cresce_com_a_concorrencia():
+    duracoes = {}
+    for concorrencia in (1, 8):
+        duracoes[concorrencia] = asyncio.run(
+            _processar(ProcessadorPorChat(concorrencia), Registro(), chats=8, por_chat=2, duracao=0.05)
+        )
+    # 16 atualizações de 50 ms: ~0,8 s uma de cada vez, ~0,1 s com oito chats em paralelo.
+    assert duracoes[8] * 3 < duracoes[1]
+
+
+def test_chat_ocupado_enquanto_tem_atualizacoes():
+    processador = ProcessadorPorChat(4)
+
+    async def cenario():
+        liberar = asyncio.Event()
+        tarefa = asyncio.create_task(processador.process_update(_atualizacao(1, 42), liberar.wait()))
+        await asyncio.sleep(0)
+        assert processador.ocupado(42)
+        assert not processador.ocupado(7)
+        liberar.set()
+        await tarefa
+        assert not processador.ocupado(42)
+
+    asyncio.run(cenario())
+
+
+def test_fila_limitada_segura_put_ate_abrir_vaga():
+    async def cenario():
+        fila = FilaLimitada(2)
+        await fila.put('a')
+        await fila.put('b')
+        terceira = asyncio.create_task(fila.put('c'))
+        await asyncio.sleep(0.01)
+        assert not terceira.done()
+        fila.get_nowait()
+        fila.task_done()
+        await asyncio.wait_for(terceira, 1)
+        assert fila.em_andamento == 2
+
+    asyncio.run(cenario())
@@ -0,0 +1,70 @@
+"""GerenciadorSessoes: expirar uma sessão encerra a conversa e apaga o estado gravado."""
+import asyncio
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import Application, ConversationHandler, MessageHandler, filters
+
+from vocacional.metricas import MetricasBot
+from vocacional.persistencia import PersistenciaSQLite
+from vocacional.sessoes import EncerrarSessao, GerenciadorSessoes
+
+TESTE = 4
+CHAT_ID = USER_ID = 42
+
+
+def _mensagem(update_id: int) -> Update:
+    return Update(
+        update_id=update_id,
+        message=Message(
+            message_id=update_id, date=datetime.now(), chat=Chat(id=CHAT_ID, type=Chat.PRIVATE),
+            from_user=User(id=USER_ID, first_name='Ana', is_bot=False), text='oi',
+        ),
+    )
+
+
+async def _comecar(update, context) -> int:
+    return TESTE
+
+
+def test_expirar_encerra_a_conversa_e_zera_as_metricas(tmp_path):
+    async def cenario():
+        persistencia = PersistenciaSQLite(str(tmp_path / 'estado.db'), update_interval=60)
+        application = Application.builder().token('123:ABC').persistence(persistencia).build()
+        conversas = ConversationHandler(
+            entry_points=[MessageHandler(filters.TEXT, _comecar)],
+            states={TESTE: [EncerrarSessao(), MessageHandler(filters.TEXT, _comecar)]},
+            fallbacks=[],
+            name='teste',
+        )
+        sessoes = GerenciadorSessoes(application, conversas, ttl=0.01)
+        metricas = MetricasBot()
+        metricas.acompanhar_conversas(persistencia, 'teste', {TESTE: 'TESTE'})
+        metricas.acompanhar_sessoes(sessoes)
+
+        atualizacao = _mensagem(1)
+        await sessoes.registrar(atualizacao, None)
+        await conversas.handle_update(atualizacao, application, conversas.check_update(atualizacao), None)
+        # O Application repassaria estas mudanças na gravação periódica.
+        await persistencia.update_conversation('teste', (CHAT_ID, USER_ID), TESTE)
+        await persistencia.update_user_data(USER_ID, {'respostas': {}})
+        await asyncio.sleep(0.05)
+
+        texto = metricas.registro.renderizar()
+        assert 'bot_conversas_ativas{estado="TESTE"} 1' in texto
+        assert 'bot_sessoes_ativas 1' in texto
+        assert conversas.check_update(_mensagem(2))[0] == TESTE
+
+        assert await sessoes.varrer() == 1
+        await asyncio.sleep(0.05)
+
+        texto = metricas.registro.renderizar()
+        assert 'bot_conversas_ativas{estado="TESTE"} 0' in texto
+        assert 'bot_sessoes_ativas 0' in texto
+        assert await persistencia.get_conversations('teste') == {}
+        assert persistencia.usuarios_salvos() == {}
+        # Sem estado, a próxima mensagem volta ao ponto de entrada.
+        assert conversas.check_update(_mensagem(3))[0] is None
+        await persistencia.flush()
+
+    asyncio.run(cenario())
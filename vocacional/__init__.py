@@ -0,0 +1 @@
+"""Componentes de apoio ao bot do Teste Vocacional (``bot.py``)."""
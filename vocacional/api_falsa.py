@@ -0,0 +1,217 @@
+"""Servidor local que imita a Bot API do Telegram, para testes sem rede.
+
+Aponte o bot para ele com ``TELEGRAM_API_URL`` (ou ``base_url`` no builder) e use
+:meth:`ApiFalsa.mensagem` / :meth:`ApiFalsa.clique` para fabricar atualizações,
+entregues por :meth:`ApiFalsa.entregar` (webhook) ou pelo ``getUpdates``
+(polling). Todas as chamadas recebidas ficam registradas em ``chamadas``; com
+``flood = n``, as próximas ``n`` chamadas recebem um erro 429 com ``retry_after``.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+
+import aiohttp
+from aiohttp import web
+
+TOKEN_PADRAO = '123456:TESTE'
+
+
+class ApiFalsa:
+    def __init__(self, token: str = TOKEN_PADRAO, latencia: float = 0.0):
+        self.token = token
+        self.latencia = latencia
+        self.flood: int = 0
+        self.flood_espera: int = 1
+        self.chamadas: list[tuple[str, dict]] = []
+        self.contagem: Counter = Counter()
+        self.mensagens: dict[int, dict] = {}
+        self.respostas_por_chat: Counter = Counter()
+        self._ultima_por_chat: dict[int, int] = {}
+        self._esperas: dict[int, list[tuple[int, asyncio.Future]]] = {}
+        self.webhook: dict | None = None
+        self.url: str | None = None
+        self._fila_updates: asyncio.Queue = asyncio.Queue()
+        self._ids_mensagem = itertools.count(1)
+        self._ids_update = itertools.count(1)
+        self._ids_clique = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self._sessao: aiohttp.ClientSession | None = None
+        self.app = web.Application()
+        self.app.router.add_post('/bot{token}/{metodo}', self._atender)
+
+    async def iniciar(self, host: str = '127.0.0.1', porta: int = 0) -> str:
+        """Sobe o servidor e devolve a ``base_url`` a ser usada pelo bot."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, porta)
+        await site.start()
+        porta = site._server.sockets[0].getsockname()[1]
+        self.url = f'http://{host}:{porta}/bot'
+        return self.url
+
+    async def parar(self) -> None:
+        if self._sessao is not None:
+            await self._sessao.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # Atualizações fabricadas
+
+    def _usuario(self, user_id: int) -> dict:
+        return {'id': user_id, 'is_bot': False, 'first_name': f'Usuário {user_id}'}
+
+    def _chat(self, chat_id: int) -> dict:
+        return {'id': chat_id, 'type': 'private'}
+
+    def mensagem(self, user_id: int, texto: str) -> dict:
+        mensagem = {
+            'message_id': next(self._ids_mensagem),
+            'date': int(time.time()),
+            'chat': self._chat(user_id),
+            'from': self._usuario(user_id),
+            'text': texto,
+        }
+        if texto.startswith('/'):
+            comando = texto.split()[0]
+            mensagem['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(comando)}]
+        return {'update_id': next(self._ids_update), 'message': mensagem}
+
+    def clique(self, user_id: int, message_id: int, dados: str) -> dict:
+        mensagem = self.mensagens.get(message_id) or {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': self._chat(user_id),
+        }
+        return {
+            'update_id': next(self._ids_update),
+            'callback_query': {
+                'id': str(next(self._ids_clique)),
+                'from': self._usuario(user_id),
+                'chat_instance': str(user_id),
+                'message': mensagem,
+                'data': dados,
+            },
+        }
+
+    async def aguardar_respostas(self, chat_id: int, total: int) -> None:
+        """Espera até o chat ter recebido ``total`` mensagens (enviadas ou editadas)."""
+        if self.respostas_por_chat[chat_id] >= total:
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        self._esperas.setdefault(chat_id, []).append((total, futuro))
+        await futuro
+
+    def _registrar_resposta(self, chat_id: int) -> None:
+        self.respostas_por_chat[chat_id] += 1
+        esperas = self._esperas.get(chat_id)
+        if not esperas:
+            return
+        atual = self.respostas_por_chat[chat_id]
+        pendentes = []
+        for total, futuro in esperas:
+            if futuro.done():
+                continue
+            if total <= atual:
+                futuro.set_result(None)
+            else:
+                pendentes.append((total, futuro))
+        self._esperas[chat_id] = pendentes
+
+    def ultima_mensagem(self, chat_id: int) -> dict | None:
+        return self.mensagens.get(self._ultima_por_chat.get(chat_id))
+
+    async def entregar(self, update: dict, url: str | None = None, segredo: str | None = None) -> int:
+        """Entrega a atualização por webhook (ou pelo ``getUpdates`` se não houver URL)."""
+        url = url or (self.webhook or {}).get('url')
+        if not url:
+            await self._fila_updates.put(update)
+            return 200
+        segredo = segredo if segredo is not None else (self.webhook or {}).get('secret_token')
+        cabecalhos = {'X-Telegram-Bot-Api-Secret-Token': segredo} if segredo else {}
+        if self._sessao is None:
+            self._sessao = aiohttp.ClientSession()
+        async with self._sessao.post(url, json=update, headers=cabecalhos) as resposta:
+            return resposta.status
+
+    # Bot API
+
+    async def _atender(self, request: web.Request) -> web.Response:
+        if request.match_info['token'] != self.token:
+            return web.json_response({'ok': False, 'error_code': 401, 'description': 'Unauthorized'}, status=401)
+        metodo = request.match_info['metodo']
+        parametros = {}
+        for chave, valor in (await request.post()).items():
+            try:
+                parametros[chave] = json.loads(valor)
+            except (TypeError, ValueError):
+                parametros[chave] = valor
+        self.chamadas.append((metodo, parametros))
+        self.contagem[metodo] += 1
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        if self.flood > 0 and metodo not in ('getMe', 'getUpdates'):
+            self.flood -= 1
+            return web.json_response(
+                {
+                    'ok': False,
+                    'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.flood_espera}',
+                    'parameters': {'retry_after': self.flood_espera},
+                },
+                status=429,
+            )
+        tratador = getattr(self, f'_api_{metodo}', None)
+        resultado = await tratador(parametros) if tratador else True
+        return web.json_response({'ok': True, 'result': resultado})
+
+    async def _api_getMe(self, parametros: dict):
+        bot_id = int(self.token.split(':')[0])
+        return {'id': bot_id, 'is_bot': True, 'first_name': 'Teste Vocacional', 'username': 'teste_vocacional_bot'}
+
+    async def _api_sendMessage(self, parametros: dict):
+        mensagem = {
+            'message_id': next(self._ids_mensagem),
+            'date': int(time.time()),
+            'chat': self._chat(int(parametros['chat_id'])),
+            'text': str(parametros.get('text', '')),
+        }
+        if parametros.get('reply_markup'):
+            mensagem['reply_markup'] = parametros['reply_markup']
+        self.mensagens[mensagem['message_id']] = mensagem
+        self._ultima_por_chat[mensagem['chat']['id']] = mensagem['message_id']
+        self._registrar_resposta(mensagem['chat']['id'])
+        return mensagem
+
+    async def _api_editMessageText(self, parametros: dict):
+        mensagem = self.mensagens.get(int(parametros.get('message_id', 0)))
+        if mensagem is None:
+            return True
+        mensagem['text'] = str(parametros.get('text', ''))
+        mensagem['edit_date'] = int(time.time())
+        if parametros.get('reply_markup'):
+            mensagem['reply_markup'] = parametros['reply_markup']
+        else:
+            mensagem.pop('reply_markup', None)
+        self._registrar_resposta(mensagem['chat']['id'])
+        return mensagem
+
+    async def _api_setWebhook(self, parametros: dict):
+        self.webhook = {'url': parametros.get('url'), 'secret_token': parametros.get('secret_token')}
+        return True
+
+    async def _api_deleteWebhook(self, parametros: dict):
+        self.webhook = None
+        return True
+
+    async def _api_getUpdates(self, parametros: dict):
+        espera = float(parametros.get('timeout') or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._fila_updates.get(), espera or 0.01))
+        except asyncio.TimeoutError:
+            return []
+        while not self._fila_updates.empty():
+            updates.append(self._fila_updates.get_nowait())
+        return updates
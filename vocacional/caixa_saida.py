@@ -0,0 +1,133 @@
+"""Caixa de saída local dos resultados do teste.
+
+Todo resultado é gravado primeiro num arquivo SQLite (modo WAL, somente inserção)
+e só é marcado como enviado depois que o destino remoto confirma a gravação. Se
+o processo cair, as linhas pendentes são reenviadas na próxima inicialização, o
+que garante entrega *ao menos uma vez*.
+
+Uso pela linha de comando::
+
+    python -m vocacional.caixa_saida inspecionar
+    python -m vocacional.caixa_saida reenviar
+    python -m vocacional.caixa_saida compactar --dias 30
+"""
+import argparse
+import json
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS saida (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    criado_em REAL NOT NULL,
+    linha TEXT NOT NULL,
+    enviado_em REAL
+);
+CREATE INDEX IF NOT EXISTS ix_saida_pendentes ON saida (id) WHERE enviado_em IS NULL;
+"""
+
+
+class CaixaSaida:
+    """Fila durável de linhas de resultado à espera de envio.
+
+    ``sincrono`` é repassado ao ``PRAGMA synchronous``: ``NORMAL`` (padrão) resiste
+    à queda do processo mantendo a inserção abaixo de 1 ms; ``FULL`` faz fsync a
+    cada inserção e resiste também à queda de energia.
+    """
+
+    def __init__(self, caminho: str, sincrono: str = 'NORMAL'):
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute(f'PRAGMA synchronous={sincrono}')
+        self._conexao.executescript(ESQUEMA)
+
+    def registrar(self, linha: list) -> int:
+        cursor = self._conexao.execute(
+            'INSERT INTO saida (criado_em, linha) VALUES (?, ?)',
+            (time.time(), json.dumps(linha, ensure_ascii=False, separators=(',', ':'))),
+        )
+        return cursor.lastrowid
+
+    def pendentes(self, limite: int | None = None) -> list[tuple[int, list]]:
+        sql = 'SELECT id, linha FROM saida WHERE enviado_em IS NULL ORDER BY id'
+        if limite:
+            sql += f' LIMIT {int(limite)}'
+        return [(id_, json.loads(linha)) for id_, linha in self._conexao.execute(sql)]
+
+    def confirmar(self, ids: list[int]) -> None:
+        agora = time.time()
+        with self._conexao:
+            self._conexao.execute('BEGIN')
+            self._conexao.executemany(
+                'UPDATE saida SET enviado_em = ? WHERE id = ?', [(agora, id_) for id_ in ids]
+            )
+
+    def contagem(self) -> dict:
+        pendentes, enviados = self._conexao.execute(
+            'SELECT COUNT(*) - COUNT(enviado_em), COUNT(enviado_em) FROM saida'
+        ).fetchone()
+        return {'pendentes': pendentes, 'enviados': enviados}
+
+    def compactar(self, dias: float = 0) -> int:
+        """Remove as linhas já enviadas há mais de ``dias`` dias e libera o espaço."""
+        limite = time.time() - dias * 86400
+        cursor = self._conexao.execute(
+            'DELETE FROM saida WHERE enviado_em IS NOT NULL AND enviado_em <= ?', (limite,)
+        )
+        self._conexao.execute('VACUUM')
+        return cursor.rowcount
+
+    def fechar(self) -> None:
+        self._conexao.close()
+
+
+def reenviar(caixa: CaixaSaida, destino, tamanho_lote: int = 100) -> int:
+    """Esvazia a caixa de saída no destino, lote a lote. Retorna as linhas enviadas."""
+    total = 0
+    while True:
+        lote = caixa.pendentes(tamanho_lote)
+        if not lote:
+            return total
+        destino.enviar([linha for _, linha in lote])
+        caixa.confirmar([id_ for id_, _ in lote])
+        total += len(lote)
+
+
+def main(argv=None):
+    from .config import Configuracao
+    from .planilha import DestinoPlanilha
+
+    config = Configuracao.do_ambiente()
+    parser = argparse.ArgumentParser(prog='python -m vocacional.caixa_saida', description=__doc__.splitlines()[0])
+    parser.add_argument('--arquivo', default=config.caixa_saida, help='arquivo SQLite da caixa de saída')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    inspecionar = comandos.add_parser('inspecionar', help='mostra a contagem e as linhas pendentes')
+    inspecionar.add_argument('--limite', type=int, default=20)
+    reenvio = comandos.add_parser('reenviar', help='envia as linhas pendentes para a planilha')
+    reenvio.add_argument('--lote', type=int, default=100)
+    compactacao = comandos.add_parser('compactar', help='apaga as linhas já enviadas')
+    compactacao.add_argument('--dias', type=float, default=0, help='mantém as enviadas nos últimos N dias')
+    args = parser.parse_args(argv)
+
+    caixa = CaixaSaida(args.arquivo)
+    try:
+        if args.comando == 'inspecionar':
+            contagem = caixa.contagem()
+            print(f"Pendentes: {contagem['pendentes']} | Enviadas: {contagem['enviados']}")
+            for id_, linha in caixa.pendentes(args.limite):
+                print(f"#{id_}: {linha}")
+        elif args.comando == 'reenviar':
+            total = reenviar(caixa, DestinoPlanilha(config.credenciais, config.planilha), args.lote)
+            print(f"{total} linha(s) enviada(s).")
+        elif args.comando == 'compactar':
+            print(f"{caixa.compactar(args.dias)} linha(s) removida(s).")
+    finally:
+        caixa.fechar()
+
+
+if __name__ == '__main__':
+    main()
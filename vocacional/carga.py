@@ -0,0 +1,223 @@
+"""Teste de carga de ponta a ponta do bot, sem rede.
+
+Sobe a Bot API falsa e o bot (``bot.criar_aplicacao``) com um destino de planilha
+em memória e conduz N participantes sintéticos pelo fluxo completo: ``/start``,
+nome, e-mail, telefone, idade e as respostas até o resultado. A latência de cada
+passo é medida do momento em que a atualização entra na fila do bot até a
+resposta correspondente chegar à API falsa.
+
+Ao final, cada linha gravada é conferida: um teste concluído precisa ter exatamente
+uma resposta por pergunta, o que denuncia atualizações de um mesmo chat
+processadas fora de ordem ou em paralelo.
+
+Exemplo, falhando (código de saída 1) se o p95 passar de 500 ms ou houver erros::
+
+    python -m vocacional.carga --usuarios 300 --chegada 30 --pensar 0.5 --p95-max 0.5
+"""
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+from telegram import Update
+
+from .api_falsa import ApiFalsa, TOKEN_PADRAO
+from .config import Configuracao
+from .planilha import DestinoMemoria
+from .pontuacao import coluna_respostas
+
+ETAPAS_CADASTRO = [
+    ('start', '/start', 1),
+    ('coletar_nome', 'Participante', 1),
+    ('coletar_email', 'participante@example.com', 1),
+    ('coletar_telefone', '(11) 90000-0000', 1),
+    ('coletar_idade', '17', 2),
+]
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+class Carga:
+    def __init__(self, application, api: ApiFalsa, pensar: float, tempo_limite: float, rng: random.Random):
+        self.application = application
+        self.api = api
+        self.pensar = pensar
+        self.tempo_limite = tempo_limite
+        self.rng = rng
+        self.multipla = application.bot_data['config'].modo_quiz == 'multipla'
+        self.latencias: dict[str, list[float]] = defaultdict(list)
+        self.erros: Counter = Counter()
+        self.concluidos = 0
+
+    async def _passo(self, etapa: str, user_id: int, update: dict, respostas_esperadas: int) -> bool:
+        alvo = self.api.respostas_por_chat[user_id] + respostas_esperadas
+        inicio = time.perf_counter()
+        await self.application.update_queue.put(Update.de_json(update, self.application.bot))
+        try:
+            await asyncio.wait_for(self.api.aguardar_respostas(user_id, alvo), self.tempo_limite)
+        except asyncio.TimeoutError:
+            self.erros[f'{etapa}: sem resposta'] += 1
+            return False
+        self.latencias[etapa].append(time.perf_counter() - inicio)
+        return True
+
+    async def _pausa(self) -> None:
+        if self.pensar:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.pensar))
+
+    async def participante(self, user_id: int) -> None:
+        for etapa, texto, esperadas in ETAPAS_CADASTRO:
+            if not await self._passo(etapa, user_id, self.api.mensagem(user_id, texto), esperadas):
+                return
+            await self._pausa()
+
+        while True:
+            mensagem = self.api.ultima_mensagem(user_id)
+            teclado = (mensagem or {}).get('reply_markup', {}).get('inline_keyboard')
+            if not teclado:
+                break
+            botao = self.rng.choice(teclado)[0]
+            clique = self.api.clique(user_id, mensagem['message_id'], botao['callback_data'])
+            if not await self._passo('processar_resposta', user_id, clique, 2 if self.multipla else 1):
+                return
+            await self._pausa()
+
+        texto = (self.api.ultima_mensagem(user_id) or {}).get('text', '')
+        if 'TESTE CONCLUÍDO' in texto:
+            self.concluidos += 1
+        else:
+            self.erros['teste não concluído'] += 1
+
+
+async def executar(args) -> dict:
+    api = ApiFalsa(latencia=args.latencia_api)
+    url = await api.iniciar()
+    destino = DestinoMemoria(latencia=args.latencia_planilha)
+
+    import bot
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as pasta:
+        config_padrao = Configuracao.do_ambiente()
+        config = dataclasses.replace(
+            config_padrao,
+            token=TOKEN_PADRAO,
+            api_url=url,
+            caixa_saida=f'{pasta}/caixa_saida.db',
+            estado=f'{pasta}/estado.db',
+            indice_resultados=f'{pasta}/resultados.db',
+            versoes_questionario=f'{pasta}/questionarios.db',
+            estatisticas=f'{pasta}/estatisticas.json',
+            metricas_porta=0,
+            atualizacoes_concorrentes=args.concorrencia or config_padrao.atualizacoes_concorrentes,
+        )
+        application = bot.criar_aplicacao(config, destino)
+
+        async def contar_erro(update, context):
+            carga.erros[type(context.error).__name__] += 1
+
+        application.add_error_handler(contar_erro)
+        carga = Carga(application, api, args.pensar, args.tempo_limite, random.Random(args.semente))
+
+        async with application:
+            await application.post_init(application)
+            await application.start()
+            inicio = time.perf_counter()
+            tarefas = []
+            for user_id in range(1, args.usuarios + 1):
+                tarefas.append(asyncio.create_task(carga.participante(100000 + user_id)))
+                if args.chegada:
+                    await asyncio.sleep(carga.rng.expovariate(args.chegada))
+            await asyncio.gather(*tarefas)
+            duracao = time.perf_counter() - inicio
+            await application.stop()
+            await application.post_shutdown(application)
+    await api.parar()
+
+    pontuador = application.bot_data['questionarios'].atual.pontuador
+    coluna = coluna_respostas(pontuador)
+    for linha in destino.linhas:
+        respostas = str(linha[coluna])
+        if len(respostas) != pontuador.total_perguntas or '-' in respostas:
+            carga.erros['linha gravada inconsistente'] += 1
+
+    todas = [valor for valores in carga.latencias.values() for valor in valores]
+    return {
+        'usuarios': args.usuarios,
+        'concorrencia': config.atualizacoes_concorrentes,
+        'concluidos': carga.concluidos,
+        'duracao': duracao,
+        'atualizacoes_por_segundo': len(todas) / duracao if duracao else 0.0,
+        'testes_por_segundo': carga.concluidos / duracao if duracao else 0.0,
+        'linhas_gravadas': len(destino.linhas),
+        'chamadas_api': dict(api.contagem),
+        'erros': dict(carga.erros),
+        'latencia': {
+            etapa: {
+                'n': len(valores),
+                'p50': percentil(valores, 50),
+                'p95': percentil(valores, 95),
+                'p99': percentil(valores, 99),
+            }
+            for etapa, valores in [('total', todas), *carga.latencias.items()]
+        },
+    }
+
+
+def imprimir(relatorio: dict) -> None:
+    print(
+        f"{relatorio['concluidos']}/{relatorio['usuarios']} testes concluídos em {relatorio['duracao']:.1f}s, "
+        f"concorrência {relatorio['concorrencia']} "
+        f"({relatorio['atualizacoes_por_segundo']:.1f} atualizações/s, "
+        f"{relatorio['testes_por_segundo']:.2f} testes/s, {relatorio['linhas_gravadas']} linhas gravadas)"
+    )
+    print(f"{'etapa':<20}{'n':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+    for etapa, dados in relatorio['latencia'].items():
+        print(
+            f"{etapa:<20}{dados['n']:>8}{dados['p50'] * 1000:>12.1f}"
+            f"{dados['p95'] * 1000:>12.1f}{dados['p99'] * 1000:>12.1f}"
+        )
+    print(f"Chamadas à Bot API: {relatorio['chamadas_api']}")
+    print(f"Erros: {relatorio['erros'] or 'nenhum'}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m vocacional.carga', description=__doc__.splitlines()[0])
+    parser.add_argument('--usuarios', type=int, default=100, help='participantes sintéticos')
+    parser.add_argument('--chegada', type=float, default=20, help='chegadas por segundo (0 = todos de uma vez)')
+    parser.add_argument('--pensar', type=float, default=0.2, help='tempo médio (s) entre uma resposta e a próxima')
+    parser.add_argument('--latencia-api', type=float, default=0.0, help='latência (s) simulada da Bot API')
+    parser.add_argument('--latencia-planilha', type=float, default=0.2, help='latência (s) simulada da planilha')
+    parser.add_argument('--concorrencia', type=int, help='atualizações processadas em paralelo (UPDATE_CONCURRENCY)')
+    parser.add_argument('--tempo-limite', type=float, default=30, help='espera máxima (s) por cada resposta')
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--p95-max', type=float, help='falha se o p95 total (s) passar deste valor')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    relatorio = asyncio.run(executar(args))
+    if args.json:
+        print(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    else:
+        imprimir(relatorio)
+
+    falhou = bool(relatorio['erros']) or relatorio['concluidos'] < relatorio['usuarios']
+    if args.p95_max is not None and relatorio['latencia']['total']['p95'] > args.p95_max:
+        falhou = True
+    return 1 if falhou else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import os
+from dataclasses import dataclass
+
+
+def _env_int(nome: str, padrao: int) -> int:
+    valor = os.getenv(nome)
+    try:
+        return int(valor) if valor else padrao
+    except ValueError:
+        return padrao
+
+
+def _env_ids(nome: str) -> frozenset[int]:
+    valores = (parte.strip() for parte in os.getenv(nome, "").split(","))
+    return frozenset(int(valor) for valor in valores if valor.lstrip("-").isdigit())
+
+
+def _env_bool(nome: str, padrao: bool) -> bool:
+    valor = os.getenv(nome)
+    if not valor:
+        return padrao
+    return valor.strip().lower() in ("1", "true", "sim", "yes", "on")
+
+
+def _env_float(nome: str, padrao: float) -> float:
+    valor = os.getenv(nome)
+    try:
+        return float(valor) if valor else padrao
+    except ValueError:
+        return padrao
+
+
+@dataclass(frozen=True)
+class Configuracao:
+    """Parâmetros do bot lidos das variáveis de ambiente."""
+
+    token: str | None = None
+    modo: str = "polling"
+    modo_quiz: str = "unica"
+    api_url: str | None = None
+    webhook_url: str | None = None
+    webhook_segredo: str | None = None
+    webhook_host: str = "0.0.0.0"
+    webhook_porta: int = 8443
+    webhook_caminho: str = "/telegram"
+    credenciais: str = "credentials.json"
+    planilha: str = "Teste Vocacional - Respostas"
+    lote_tamanho: int = 20
+    lote_intervalo: float = 2.0
+    lote_tentativas: int = 5
+    lote_espera_inicial: float = 1.0
+    caixa_saida: str = "caixa_saida.db"
+    indice_resultados: str = "resultados.db"
+    estatisticas: str = "estatisticas.json"
+    estatisticas_intervalo: float = 60.0
+    reenvio_intervalo: float = 60.0
+    questionario: str = os.path.join(os.path.dirname(__file__), "questionario.json")
+    versoes_questionario: str = "questionarios.db"
+    admins: frozenset[int] = frozenset()
+    estado: str = "estado_bot.db"
+    estado_intervalo: float = 30.0
+    envio_taxa_global: float = 30.0
+    envio_grupo_por_minuto: float = 20.0
+    envio_tentativas: int = 3
+    atualizacoes_concorrentes: int = 16
+    sessao_ttl: float = 86400.0
+    sessao_maximo: int = 10000
+    sessao_varredura: float = 60.0
+    sessao_retomar: bool = True
+    atualizacoes_pendentes: int = 1000
+    metricas_host: str = "127.0.0.1"
+    metricas_porta: int = 9464
+
+    @classmethod
+    def do_ambiente(cls) -> "Configuracao":
+        return cls(
+            token=os.getenv("TELEGRAM_BOT_TOKEN"),
+            modo=os.getenv("BOT_MODE", cls.modo).lower(),
+            modo_quiz=os.getenv("QUIZ_MODE", cls.modo_quiz).lower(),
+            api_url=os.getenv("TELEGRAM_API_URL") or None,
+            webhook_url=os.getenv("WEBHOOK_URL") or None,
+            webhook_segredo=os.getenv("WEBHOOK_SECRET") or None,
+            webhook_host=os.getenv("WEBHOOK_LISTEN", cls.webhook_host),
+            webhook_porta=_env_int("WEBHOOK_PORT", cls.webhook_porta),
+            webhook_caminho=os.getenv("WEBHOOK_PATH", cls.webhook_caminho),
+            credenciais=os.getenv("GOOGLE_CREDENTIALS", cls.credenciais),
+            planilha=os.getenv("GOOGLE_SHEET_NAME", cls.planilha),
+            lote_tamanho=_env_int("SHEETS_BATCH_SIZE", cls.lote_tamanho),
+            lote_intervalo=_env_float("SHEETS_BATCH_INTERVAL", cls.lote_intervalo),
+            lote_tentativas=_env_int("SHEETS_MAX_RETRIES", cls.lote_tentativas),
+            lote_espera_inicial=_env_float("SHEETS_RETRY_BACKOFF", cls.lote_espera_inicial),
+            caixa_saida=os.getenv("RESULTS_OUTBOX", cls.caixa_saida),
+            indice_resultados=os.getenv("RESULTS_INDEX", cls.indice_resultados),
+            estatisticas=os.getenv("STATS_PATH", cls.estatisticas),
+            estatisticas_intervalo=_env_float("STATS_FLUSH_INTERVAL", cls.estatisticas_intervalo),
+            reenvio_intervalo=_env_float("RESULTS_REPLAY_INTERVAL", cls.reenvio_intervalo),
+            questionario=os.getenv("QUESTIONNAIRE_PATH", cls.questionario),
+            versoes_questionario=os.getenv("QUESTIONNAIRE_VERSIONS_DB", cls.versoes_questionario),
+            admins=_env_ids("TELEGRAM_ADMIN_IDS"),
+            estado=os.getenv("BOT_STATE_DB", cls.estado),
+            estado_intervalo=_env_float("BOT_STATE_FLUSH_INTERVAL", cls.estado_intervalo),
+            envio_taxa_global=_env_float("SEND_RATE_GLOBAL", cls.envio_taxa_global),
+            envio_grupo_por_minuto=_env_float("SEND_RATE_PER_GROUP", cls.envio_grupo_por_minuto),
+            envio_tentativas=_env_int("SEND_MAX_RETRIES", cls.envio_tentativas),
+            sessao_ttl=_env_float("SESSION_TTL", cls.sessao_ttl),
+            sessao_maximo=_env_int("SESSION_MAX", cls.sessao_maximo),
+            sessao_varredura=_env_float("SESSION_SWEEP_INTERVAL", cls.sessao_varredura),
+            sessao_retomar=_env_bool("SESSION_RESUME_MESSAGE", cls.sessao_retomar),
+            atualizacoes_concorrentes=_env_int("UPDATE_CONCURRENCY", cls.atualizacoes_concorrentes),
+            atualizacoes_pendentes=_env_int("UPDATE_MAX_PENDING", cls.atualizacoes_pendentes),
+            metricas_host=os.getenv("METRICS_LISTEN", cls.metricas_host),
+            metricas_porta=_env_int("METRICS_PORT", cls.metricas_porta),
+        )
@@ -0,0 +1,104 @@
+"""Estatísticas ao vivo dos testes, para o comando ``/estatisticas``.
+
+Contadores incrementais em memória (testes iniciados e concluídos e a
+distribuição de perfis, do dia e desde o início), atualizados pelos handlers e
+lidos em O(1). Uma tarefa em segundo plano grava os contadores num arquivo JSON
+a cada ``intervalo`` segundos, se tiverem mudado, para que sobrevivam a uma
+reinicialização; a planilha nunca é consultada.
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import Counter
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+
+class Estatisticas:
+    def __init__(self, caminho: str, intervalo: float = 60):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.dia = date.today().isoformat()
+        self.hoje = {'iniciados': 0, 'concluidos': 0, 'perfis': Counter()}
+        self.total = {'iniciados': 0, 'concluidos': 0, 'perfis': Counter()}
+        self._alterado = False
+        self._tarefa: asyncio.Task | None = None
+        self._carregar()
+
+    def _carregar(self) -> None:
+        try:
+            with open(self.caminho, encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Estatísticas não carregadas de {self.caminho}: {e}")
+            return
+        for chave in ('hoje', 'total'):
+            contadores = dados.get(chave, {})
+            getattr(self, chave).update(
+                iniciados=contadores.get('iniciados', 0),
+                concluidos=contadores.get('concluidos', 0),
+                perfis=Counter(contadores.get('perfis', {})),
+            )
+        if dados.get('dia') != self.dia:
+            self._virar_dia(date.today().isoformat())
+
+    def _virar_dia(self, dia: str) -> None:
+        self.dia = dia
+        self.hoje = {'iniciados': 0, 'concluidos': 0, 'perfis': Counter()}
+
+    def _registrar(self, chave: str, perfil: str | None = None) -> None:
+        dia = date.today().isoformat()
+        if dia != self.dia:
+            self._virar_dia(dia)
+        for contadores in (self.hoje, self.total):
+            contadores[chave] += 1
+            if perfil is not None:
+                contadores['perfis'][perfil] += 1
+        self._alterado = True
+
+    def iniciado(self) -> None:
+        self._registrar('iniciados')
+
+    def concluido(self, perfil: str) -> None:
+        self._registrar('concluidos', perfil)
+
+    def resumo(self) -> dict:
+        if date.today().isoformat() != self.dia:
+            self._virar_dia(date.today().isoformat())
+        return {'dia': self.dia, 'hoje': self.hoje, 'total': self.total}
+
+    def salvar(self) -> None:
+        dados = json.dumps(self.resumo(), ensure_ascii=False)
+        temporario = f'{self.caminho}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, self.caminho)
+        self._alterado = False
+
+    async def iniciar(self) -> None:
+        self._tarefa = asyncio.create_task(self._gravar_periodicamente())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        if self._alterado:
+            self.salvar()
+
+    async def _gravar_periodicamente(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            if not self._alterado:
+                continue
+            try:
+                self.salvar()
+            except OSError as e:
+                logger.error(f"Erro ao gravar as estatísticas: {e}")
@@ -0,0 +1,142 @@
+"""Exportação colunar do histórico de resultados.
+
+Converte o CSV exportado da planilha numa pasta com um arquivo ``.npy`` por
+coluna (``q01`` ... ``qNN`` em uint8 com o índice da opção escolhida e
+:data:`~vocacional.pontuacao.SEM_RESPOSTA` para as em branco, ``perfil`` em
+uint8, ``pontos_<perfil>`` em float32, ``data`` em segundos desde a época e
+``usuario`` com o ID do Telegram, ou -1 nas linhas antigas) e um
+``manifesto.json`` descrevendo as colunas. As colunas podem ser abertas com
+``mmap`` e agregadas sem interpretar nenhum texto.
+
+Uso pela linha de comando::
+
+    python -m vocacional.exportacao exportar resultados.csv historico/
+    python -m vocacional.exportacao resumo historico/
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .pontuacao import SEM_RESPOSTA, Pontuador, coluna_respostas, ler_csv
+
+MANIFESTO = 'manifesto.json'
+FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
+
+
+def _campo(linha: list, coluna: int) -> str:
+    return linha[coluna] if coluna < len(linha) else ''
+
+
+def _segundos(texto: str) -> int:
+    try:
+        return int(datetime.strptime(texto.strip(), FORMATO_DATA).timestamp())
+    except ValueError:
+        return -1
+
+
+def _inteiro(linha: list, coluna: int) -> int:
+    try:
+        return int(linha[coluna])
+    except (IndexError, ValueError):
+        return -1
+
+
+def exportar(linhas: list, pontuador: Pontuador, pasta: str, versao: str,
+             coluna: int | None = None, coluna_data: int = 0) -> dict:
+    """Grava as colunas de ``linhas`` em ``pasta`` e devolve o manifesto."""
+    coluna = coluna_respostas(pontuador) if coluna is None else coluna
+    # Linhas sem a coluna de respostas ficam sem respostas e são ignoradas abaixo.
+    respostas = pontuador.decodificar(_campo(linha, coluna) for linha in linhas)
+    validas = (respostas != SEM_RESPOSTA).any(axis=1)
+    respostas = respostas[validas]
+    linhas = [linha for linha, valida in zip(linhas, validas) if valida]
+    datas = np.array([_segundos(_campo(linha, coluna_data)) for linha in linhas], dtype=np.int64)
+    usuarios = np.array([_inteiro(linha, coluna + 1) for linha in linhas], dtype=np.int64)
+    pontos = pontuador.pontuar(respostas).reshape(len(respostas), len(pontuador.perfis))
+    perfis = pontuador.classificar(pontos, respostas).astype(np.uint8)
+
+    colunas = {'data': datas, 'usuario': usuarios, 'perfil': perfis}
+    largura = len(str(pontuador.total_perguntas))
+    for q in range(pontuador.total_perguntas):
+        colunas[f'q{q + 1:0{max(2, largura)}d}'] = np.ascontiguousarray(respostas[:, q])
+    for indice, perfil in enumerate(pontuador.perfis):
+        colunas[f'pontos_{perfil}'] = pontos[:, indice].astype(np.float32)
+
+    os.makedirs(pasta, exist_ok=True)
+    for nome, valores in colunas.items():
+        np.save(os.path.join(pasta, f'{nome}.npy'), valores)
+    manifesto = {
+        'versao_questionario': versao,
+        'desempate': pontuador.desempate,
+        'perfis': list(pontuador.perfis),
+        'opcoes': [list(letras) for letras in pontuador.letras_opcoes],
+        'sem_resposta': SEM_RESPOSTA,
+        'linhas': int(len(respostas)),
+        'ignoradas': int(len(validas) - len(respostas)),
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'colunas': {nome: {'arquivo': f'{nome}.npy', 'dtype': str(valores.dtype)} for nome, valores in colunas.items()},
+    }
+    with open(os.path.join(pasta, MANIFESTO), 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    return manifesto
+
+
+def abrir(pasta: str, mmap: bool = True) -> tuple[dict, dict]:
+    """Manifesto e colunas de uma exportação (mapeadas em memória por padrão)."""
+    with open(os.path.join(pasta, MANIFESTO), encoding='utf-8') as arquivo:
+        manifesto = json.load(arquivo)
+    colunas = {
+        nome: np.load(os.path.join(pasta, dados['arquivo']), mmap_mode='r' if mmap else None)
+        for nome, dados in manifesto['colunas'].items()
+    }
+    return manifesto, colunas
+
+
+def resumo(pasta: str) -> str:
+    manifesto, colunas = abrir(pasta)
+    perfis = manifesto['perfis']
+    total = manifesto['linhas']
+    contagem = np.bincount(colunas['perfil'], minlength=len(perfis))
+    linhas = [f"{total} resultado(s) (questionário {manifesto['versao_questionario']})"]
+    for indice, perfil in enumerate(perfis):
+        media = float(colunas[f'pontos_{perfil}'].mean()) if total else 0.0
+        parcela = contagem[indice] / total if total else 0.0
+        linhas.append(f"Perfil {perfil}: {contagem[indice]} ({parcela:.1%}), pontuação média {media:.2f}")
+    return '\n'.join(linhas)
+
+
+def main(argv=None):
+    from .questionario import CAMINHO_PADRAO, carregar
+
+    parser = argparse.ArgumentParser(prog='python -m vocacional.exportacao', description=__doc__.splitlines()[0])
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    exportacao = comandos.add_parser('exportar', help='converte um CSV da planilha em colunas .npy')
+    exportacao.add_argument('entrada', help='CSV exportado da planilha de respostas')
+    exportacao.add_argument('pasta', help='pasta de destino')
+    exportacao.add_argument('--questionario', default=CAMINHO_PADRAO)
+    exportacao.add_argument('--coluna-respostas', type=int, help='padrão: após as pontuações')
+    exportacao.add_argument('--coluna-data', type=int, default=0)
+    resumir = comandos.add_parser('resumo', help='mostra a distribuição de perfis de uma exportação')
+    resumir.add_argument('pasta')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'exportar':
+        questionario = carregar(args.questionario)
+        coluna = args.coluna_respostas
+        if coluna is None:
+            coluna = coluna_respostas(questionario.pontuador)
+        _, linhas = ler_csv(args.entrada, coluna, questionario.pontuador)
+        manifesto = exportar(
+            linhas, questionario.pontuador, args.pasta, questionario.versao, coluna, args.coluna_data
+        )
+        print(f"{manifesto['linhas']} linha(s) exportada(s), {manifesto['ignoradas']} ignorada(s) sem respostas.")
+    elif args.comando == 'resumo':
+        print(resumo(args.pasta))
+
+
+if __name__ == '__main__':
+    main()
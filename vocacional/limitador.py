@@ -0,0 +1,179 @@
+"""Controle de vazão das chamadas à Bot API.
+
+Como o ``AIORateLimiter`` do python-telegram-bot, só chats de grupo (``chat_id``
+negativo ou ``@canal``) têm balde de tokens próprio; em chats privados cada
+participante responde sem espera além da fila global, também limitada por um
+balde de tokens. ``answerCallbackQuery`` não passa pela fila global, para que o
+botão pare de "carregar" mesmo quando há muitas mensagens esperando. Um
+``RetryAfter`` do Telegram suspende todas as chamadas pelo tempo pedido e a
+chamada é repetida.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+PRIORITARIOS = frozenset({'answerCallbackQuery'})
+
+
+class BaldeTokens:
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+
+    def _repor(self) -> None:
+        agora = time.monotonic()
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.atualizado) * self.taxa)
+        self.atualizado = agora
+
+    @property
+    def cheio(self) -> bool:
+        self._repor()
+        return self.tokens >= self.capacidade
+
+    async def adquirir(self) -> None:
+        while True:
+            self._repor()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.taxa)
+
+
+class LimitadorEnvio(BaseRateLimiter):
+    """Limitador para ``Application.builder().rate_limiter(...)``.
+
+    Os contadores (``requisicoes``, ``fila``, ``fila_maxima``, ``espera_total``,
+    ``espera_maxima`` e ``retry_after``) servem para dimensionar as taxas.
+    """
+
+    def __init__(
+        self,
+        taxa_global: float = 30,
+        taxa_grupo: float = 20 / 60,
+        tentativas: int = 3,
+        max_baldes: int = 10000,
+    ):
+        self.taxa_global = taxa_global
+        self.taxa_grupo = taxa_grupo
+        self.tentativas = tentativas
+        self.max_baldes = max_baldes
+        self._global = BaldeTokens(taxa_global, taxa_global)
+        self._baldes: dict[int | str, BaldeTokens] = {}
+        self._fila: deque[asyncio.Future] = deque()
+        self._aviso = asyncio.Event()
+        self._pausa_ate = 0.0
+        self._despachante: asyncio.Task | None = None
+        self.requisicoes = 0
+        self.fila_maxima = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.retry_after = 0
+
+    @property
+    def fila(self) -> int:
+        return len(self._fila)
+
+    def metricas(self) -> dict:
+        return {
+            'requisicoes': self.requisicoes,
+            'fila': self.fila,
+            'fila_maxima': self.fila_maxima,
+            'espera_total': self.espera_total,
+            'espera_maxima': self.espera_maxima,
+            'retry_after': self.retry_after,
+        }
+
+    async def initialize(self) -> None:
+        # O ExtBot chama este método a cada initialize(), inclusive pelo Updater.
+        if self._despachante is not None:
+            return
+        self._aviso = asyncio.Event()
+        self._despachante = asyncio.create_task(self._despachar())
+
+    async def shutdown(self) -> None:
+        if self._despachante is not None:
+            self._despachante.cancel()
+            try:
+                await self._despachante
+            except asyncio.CancelledError:
+                pass
+            self._despachante = None
+        for futuro in self._fila:
+            if not futuro.done():
+                futuro.cancel()
+        self._fila.clear()
+
+    @staticmethod
+    def _grupo(chat_id: int | str) -> bool:
+        return isinstance(chat_id, str) or chat_id < 0
+
+    def _balde_grupo(self, chat_id: int | str) -> BaldeTokens:
+        balde = self._baldes.get(chat_id)
+        if balde is None:
+            if len(self._baldes) >= self.max_baldes:
+                self._baldes = {chave: b for chave, b in self._baldes.items() if not b.cheio}
+            balde = BaldeTokens(self.taxa_grupo, 1)
+            self._baldes[chat_id] = balde
+        return balde
+
+    async def _aguardar_vez(self) -> None:
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.append(futuro)
+        self.fila_maxima = max(self.fila_maxima, len(self._fila))
+        self._aviso.set()
+        await futuro
+
+    async def _aguardar_pausa(self) -> None:
+        pausa = self._pausa_ate - time.monotonic()
+        while pausa > 0:
+            await asyncio.sleep(pausa)
+            pausa = self._pausa_ate - time.monotonic()
+
+    async def _despachar(self) -> None:
+        while True:
+            if not self._fila:
+                self._aviso.clear()
+                await self._aviso.wait()
+                continue
+            pausa = self._pausa_ate - time.monotonic()
+            if pausa > 0:
+                await asyncio.sleep(pausa)
+                continue
+            await self._global.adquirir()
+            while self._fila:
+                futuro = self._fila.popleft()
+                if not futuro.done():
+                    futuro.set_result(None)
+                    break
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id') if data else None
+        prioritario = endpoint in PRIORITARIOS
+        for tentativa in range(1, self.tentativas + 1):
+            inicio = time.monotonic()
+            if prioritario:
+                await self._aguardar_pausa()
+            else:
+                if chat_id is not None and self._grupo(chat_id):
+                    await self._balde_grupo(chat_id).adquirir()
+                await self._aguardar_vez()
+            espera = time.monotonic() - inicio
+            self.requisicoes += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self.retry_after += 1
+                self._pausa_ate = max(self._pausa_ate, time.monotonic() + e.retry_after)
+                logger.warning(f"RetryAfter em {endpoint}: aguardando {e.retry_after}s (tentativa {tentativa})")
+                if tentativa == self.tentativas:
+                    raise
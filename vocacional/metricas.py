@@ -0,0 +1,263 @@
+"""Métricas do bot no formato de texto do Prometheus.
+
+Contadores, histogramas e medidores simples, sem dependências externas. Tudo é
+atualizado no loop de eventos (sem travas) e custa um ``perf_counter`` e algumas
+operações de dicionário por atualização. Contadores e medidores com ``funcao``
+são calculados só na hora da coleta. :class:`ServidorMetricas` expõe o ``GET /metrics`` para o
+Prometheus, por padrão apenas em ``127.0.0.1``.
+"""
+import bisect
+import functools
+import logging
+import time
+from collections import Counter
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+LIMITES_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(nomes: tuple, valores: tuple, extra: str = '') -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ''
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+
+    def _chave(self, rotulos: dict) -> tuple:
+        return tuple(rotulos.get(nome, '') for nome in self.rotulos)
+
+    def _amostras(self):
+        raise NotImplementedError
+
+    def renderizar(self) -> str:
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        linhas.extend(self._amostras())
+        return '\n'.join(linhas)
+
+
+class _MetricaSimples(_Metrica):
+    """Um valor por combinação de rótulos; com ``funcao``, ela devolve
+    ``{valores dos rótulos: valor}`` na hora da coleta."""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), funcao=None):
+        super().__init__(nome, ajuda, rotulos)
+        self.funcao = funcao
+        self.valores: Counter = Counter()
+
+    def _amostras(self):
+        valores = self.valores
+        if self.funcao is not None:
+            try:
+                valores = self.funcao()
+            except Exception as e:
+                logger.warning(f"Falha ao coletar {self.nome}: {e}")
+                return
+        for chave, valor in sorted(valores.items()):
+            yield f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_numero(valor)}'
+
+
+class Contador(_MetricaSimples):
+    tipo = 'counter'
+
+    def inc(self, valor: float = 1, **rotulos) -> None:
+        self.valores[self._chave(rotulos)] += valor
+
+
+class Medidor(_MetricaSimples):
+    tipo = 'gauge'
+
+    def definir(self, valor: float, **rotulos) -> None:
+        self.valores[self._chave(rotulos)] = valor
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), limites: tuple = LIMITES_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(sorted(limites))
+        self.series: dict[tuple, list] = {}
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        serie = self.series.get(chave)
+        if serie is None:
+            # Contagem por faixa (a última é +Inf), soma e total.
+            serie = self.series[chave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+        serie[0][bisect.bisect_left(self.limites, valor)] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def _amostras(self):
+        for chave, (faixas, soma, total) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, quantidade in zip((*self.limites, float('inf')), faixas):
+                acumulado += quantidade
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_numero(limite)}"')
+                yield f'{self.nome}_bucket{rotulos} {acumulado}'
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            yield f'{self.nome}_sum{rotulos} {_numero(soma)}'
+            yield f'{self.nome}_count{rotulos} {total}'
+
+
+class Registro:
+    def __init__(self):
+        self.metricas: list[_Metrica] = []
+
+    def _registrar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: tuple = (), funcao=None) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulos, funcao))
+
+    def medidor(self, nome: str, ajuda: str, rotulos: tuple = (), funcao=None) -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, rotulos, funcao))
+
+    def histograma(self, nome: str, ajuda: str, rotulos: tuple = (), limites: tuple = LIMITES_PADRAO) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulos, limites))
+
+    def renderizar(self) -> str:
+        return '\n'.join(metrica.renderizar() for metrica in self.metricas) + '\n'
+
+
+class MetricasBot:
+    """Métricas do teste vocacional: handlers, testes, conversas, planilha e envio."""
+
+    def __init__(self, registro: Registro | None = None):
+        self.registro = registro or Registro()
+        self.handlers = self.registro.histograma(
+            'bot_handler_segundos', 'Duração de cada handler do bot.', ('handler',)
+        )
+        self.erros = self.registro.contador(
+            'bot_handler_erros_total', 'Exceções lançadas pelos handlers.', ('handler',)
+        )
+        self.testes = self.registro.contador(
+            'bot_testes_total', 'Testes iniciados, concluídos e cancelados.', ('evento',)
+        )
+        self.cliques_descartados = self.registro.contador(
+            'bot_cliques_descartados_total', 'Cliques repetidos ou em teclados antigos, só respondidos.'
+        )
+        self.envios = self.registro.histograma(
+            'bot_planilha_envio_segundos', 'Duração de cada envio de lote à planilha.', ('resultado',),
+            limites=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+        )
+        self.linhas = self.registro.contador(
+            'bot_planilha_linhas_total', 'Linhas enviadas à planilha.', ('resultado',)
+        )
+
+    def instrumentar(self, funcao):
+        """Envolve um handler assíncrono, medindo sua duração e contando exceções."""
+        nome = funcao.__name__
+
+        @functools.wraps(funcao)
+        async def medido(update, context):
+            inicio = time.perf_counter()
+            try:
+                return await funcao(update, context)
+            except Exception:
+                self.erros.inc(handler=nome)
+                raise
+            finally:
+                self.handlers.observar(time.perf_counter() - inicio, handler=nome)
+
+        return medido
+
+    def registrar_envio(self, duracao: float, linhas: int, sucesso: bool) -> None:
+        resultado = 'ok' if sucesso else 'falha'
+        self.envios.observar(duracao, resultado=resultado)
+        self.linhas.inc(linhas, resultado=resultado)
+
+    def acompanhar_conversas(self, persistencia, nome: str, estados: dict) -> None:
+        """Medidor de conversas ativas por estado, contadas nas linhas gravadas em ``persistencia``."""
+
+        def contar():
+            contagem = persistencia.conversas_por_estado(nome)
+            return {(rotulo,): contagem.get(estado, 0) for estado, rotulo in estados.items()}
+
+        self.registro.medidor('bot_conversas_ativas', 'Conversas ativas por estado.', ('estado',), contar)
+
+    def acompanhar_envio(self, limitador, gravador) -> None:
+        self.registro.medidor(
+            'bot_api_fila', 'Chamadas à Bot API esperando o limitador.', funcao=lambda: {(): limitador.fila}
+        )
+        self.registro.contador(
+            'bot_api_requisicoes_total', 'Chamadas à Bot API liberadas pelo limitador.',
+            funcao=lambda: {(): limitador.requisicoes},
+        )
+        self.registro.contador(
+            'bot_api_espera_segundos_total', 'Tempo total de espera no limitador.',
+            funcao=lambda: {(): limitador.espera_total},
+        )
+        self.registro.contador(
+            'bot_api_retry_after_total', 'Respostas 429 (retry after) recebidas da Bot API.',
+            funcao=lambda: {(): limitador.retry_after},
+        )
+        self.registro.medidor(
+            'bot_planilha_fila', 'Linhas esperando envio à planilha.', funcao=lambda: {(): gravador.pendentes}
+        )
+
+    def acompanhar_atualizacoes(self, fila, processador) -> None:
+        self.registro.medidor(
+            'bot_atualizacoes_em_andamento', 'Atualizações recebidas e ainda não concluídas.',
+            funcao=lambda: {(): fila.em_andamento},
+        )
+        self.registro.medidor(
+            'bot_chats_ativos', 'Chats com atualizações em processamento ou na fila.',
+            funcao=lambda: {(): processador.chats_ativos},
+        )
+
+    def acompanhar_sessoes(self, sessoes) -> None:
+        self.registro.medidor(
+            'bot_sessoes_ativas', 'Participantes com sessão em memória.', funcao=lambda: {(): sessoes.ativas}
+        )
+        self.registro.contador(
+            'bot_sessoes_expiradas_total', 'Sessões expiradas, por motivo (inatividade ou limite).', ('motivo',),
+            funcao=lambda: {(motivo,): total for motivo, total in sessoes.expiradas.items()},
+        )
+
+
+class ServidorMetricas:
+    def __init__(self, registro: Registro, host: str = '127.0.0.1', porta: int = 9464):
+        self.registro = registro
+        self.host = host
+        self.porta = porta
+        self._runner: web.AppRunner | None = None
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.coletar)
+
+    async def coletar(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.registro.renderizar().encode('utf-8'), headers={'Content-Type': TIPO_CONTEUDO})
+
+    async def iniciar(self) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.porta).start()
+        logger.info(f"Métricas em http://{self.host}:{self.porta}/metrics")
+
+    async def parar(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,198 @@
+"""Persistência do ``ConversationHandler`` e do ``user_data`` num arquivo SQLite.
+
+O ``Application`` só repassa à persistência os usuários e conversas que mudaram,
+a cada ``update_interval`` segundos; aqui esses lotes são gravados numa única
+transação, e dados idênticos aos lidos do arquivo são ignorados. O ``user_data`` é
+carregado sob demanda, quando chega uma atualização de um usuário sem dados na
+memória, de modo que a inicialização não lê o histórico inteiro para a memória.
+Depois de gravados, os textos não ficam guardados aqui: a memória acompanha
+apenas as sessões vivas, que o ``GerenciadorSessoes`` expira.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    user_id INTEGER PRIMARY KEY,
+    dados TEXT NOT NULL,
+    visto REAL
+);
+CREATE TABLE IF NOT EXISTS conversas (
+    nome TEXT NOT NULL,
+    chave TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    PRIMARY KEY (nome, chave)
+);
+"""
+
+
+def _serializar(dados) -> str:
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def _desserializar_usuario(texto: str) -> dict:
+    dados = json.loads(texto)
+    if isinstance(dados.get('respostas'), dict):
+        # Chaves inteiras viram texto no JSON.
+        dados['respostas'] = {int(k): v for k, v in dados['respostas'].items()}
+    return dados
+
+
+class PersistenciaSQLite(BasePersistence):
+    """Guarda o estado das conversas e o ``user_data`` de cada usuário.
+
+    ``chat_data``, ``bot_data`` e ``callback_data`` não são persistidos: o bot não
+    usa os dois primeiros para estado de usuário e guarda objetos de serviço em
+    ``bot_data``.
+    """
+
+    def __init__(self, caminho: str, update_interval: float = 30):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.executescript(ESQUEMA)
+        colunas = {linha[1] for linha in self._conexao.execute('PRAGMA table_info(usuarios)')}
+        if 'visto' not in colunas:
+            self._conexao.execute('ALTER TABLE usuarios ADD COLUMN visto REAL')
+        # Texto lido do arquivo para cada usuário carregado, até a próxima gravação.
+        self._gravados: dict[int, str] = {}
+        self._usuarios_sujos: dict[int, str | None] = {}
+        self._conversas_sujas: dict[tuple[str, str], str | None] = {}
+        self._descarga: asyncio.Task | None = None
+
+    async def get_user_data(self) -> dict:
+        return {}
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        cursor = self._conexao.execute('SELECT chave, estado FROM conversas WHERE nome = ?', (name,))
+        return {tuple(json.loads(chave)): json.loads(estado) for chave, estado in cursor}
+
+    def conversas_por_estado(self, nome: str) -> dict:
+        """Conversas gravadas de ``nome`` por estado (atrasadas até ``update_interval`` segundos)."""
+        cursor = self._conexao.execute('SELECT estado, COUNT(*) FROM conversas WHERE nome = ? GROUP BY estado', (nome,))
+        return {json.loads(estado): total for estado, total in cursor}
+
+    def usuarios_salvos(self) -> dict[int, float | None]:
+        """Usuários com ``user_data`` gravado e o instante (``time.time()``) da última gravação."""
+        return dict(self._conexao.execute('SELECT user_id, visto FROM usuarios'))
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        # Com dados na memória (ou gravação pendente), a versão da memória é a mais nova.
+        if user_data or user_id in self._usuarios_sujos:
+            return
+        linha = self._conexao.execute('SELECT dados FROM usuarios WHERE user_id = ?', (user_id,)).fetchone()
+        if linha:
+            self._gravados[user_id] = linha[0]
+            user_data.update(_desserializar_usuario(linha[0]))
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        texto = _serializar(data)
+        if self._gravados.get(user_id) != texto:
+            self._usuarios_sujos[user_id] = texto
+            self._agendar_descarga()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._gravados.pop(user_id, None)
+        self._usuarios_sujos[user_id] = None
+        self._agendar_descarga()
+
+    async def update_conversation(self, name: str, key: tuple, new_state: object | None) -> None:
+        estado = None if new_state is None else json.dumps(new_state)
+        self._conversas_sujas[(name, json.dumps(list(key)))] = estado
+        self._agendar_descarga()
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def flush(self) -> None:
+        if self._descarga is not None:
+            await self._descarga
+        self._gravar_pendentes()
+        self._conexao.close()
+
+    def _agendar_descarga(self) -> None:
+        # As atualizações de uma rodada chegam juntas (asyncio.gather); a gravação
+        # espera a rodada terminar e grava tudo numa transação.
+        if self._descarga is None or self._descarga.done():
+            self._descarga = asyncio.create_task(self._descarregar())
+
+    async def _descarregar(self) -> None:
+        await asyncio.sleep(0)
+        try:
+            self._gravar_pendentes()
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar o estado das conversas: {e}")
+
+    def _gravar_pendentes(self) -> None:
+        usuarios, self._usuarios_sujos = self._usuarios_sujos, {}
+        conversas, self._conversas_sujas = self._conversas_sujas, {}
+        if not usuarios and not conversas:
+            return
+        try:
+            self._executar_gravacao(usuarios, conversas)
+        except sqlite3.Error:
+            # Devolve o lote para a próxima rodada sem sobrescrever dados mais novos.
+            for user_id, texto in usuarios.items():
+                self._usuarios_sujos.setdefault(user_id, texto)
+            for chave, estado in conversas.items():
+                self._conversas_sujas.setdefault(chave, estado)
+            raise
+        for user_id in usuarios:
+            self._gravados.pop(user_id, None)
+
+    def _executar_gravacao(self, usuarios: dict, conversas: dict) -> None:
+        agora = time.time()
+        with self._conexao:
+            self._conexao.execute('BEGIN')
+            for user_id, texto in usuarios.items():
+                if texto is None:
+                    self._conexao.execute('DELETE FROM usuarios WHERE user_id = ?', (user_id,))
+                else:
+                    self._conexao.execute(
+                        'INSERT OR REPLACE INTO usuarios (user_id, dados, visto) VALUES (?, ?, ?)',
+                        (user_id, texto, agora),
+                    )
+            for (nome, chave), estado in conversas.items():
+                if estado is None:
+                    self._conexao.execute('DELETE FROM conversas WHERE nome = ? AND chave = ?', (nome, chave))
+                else:
+                    self._conexao.execute(
+                        'INSERT OR REPLACE INTO conversas (nome, chave, estado) VALUES (?, ?, ?)',
+                        (nome, chave, estado),
+                    )
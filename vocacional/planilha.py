@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ESCOPO = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+
+class DestinoPlanilha:
+    """Mantém um único cliente autorizado e a aba da planilha de respostas.
+
+    A conexão é aberta na primeira gravação e reaproveitada nas seguintes; se uma
+    gravação falhar, a aba é descartada e reaberta na próxima tentativa.
+    """
+
+    def __init__(self, credenciais: str, nome_planilha: str):
+        self.credenciais = credenciais
+        self.nome_planilha = nome_planilha
+        self._aba = None
+        self._trava = threading.Lock()
+
+    def _conectar(self):
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        creds = ServiceAccountCredentials.from_json_keyfile_name(self.credenciais, ESCOPO)
+        client = gspread.authorize(creds)
+        return client.open(self.nome_planilha).sheet1
+
+    def enviar(self, linhas: list[list]) -> None:
+        """Grava as linhas na planilha numa única chamada (bloqueante)."""
+        with self._trava:
+            if self._aba is None:
+                self._aba = self._conectar()
+            try:
+                self._aba.append_rows(linhas, value_input_option='USER_ENTERED')
+            except Exception:
+                self._aba = None
+                raise
+
+
+class DestinoMemoria:
+    """Destino falso que guarda as linhas em memória, para testes sem rede."""
+
+    def __init__(self, latencia: float = 0.0, falhas: int = 0):
+        self.linhas: list[list] = []
+        self.chamadas = 0
+        self.latencia = latencia
+        self.falhas = falhas
+
+    def enviar(self, linhas: list[list]) -> None:
+        self.chamadas += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.falhas > 0:
+            self.falhas -= 1
+            raise ConnectionError("falha simulada")
+        self.linhas.extend(linhas)
+
+
+class GravadorResultados:
+    """Fila assíncrona que grava os resultados em lotes, fora do loop de eventos.
+
+    Os handlers apenas chamam :meth:`enfileirar`; uma tarefa em segundo plano junta
+    as linhas até ``tamanho_lote`` ou ``intervalo`` segundos e envia o lote ao
+    destino numa thread, repetindo com espera exponencial em caso de erro.
+
+    Com uma :class:`~vocacional.caixa_saida.CaixaSaida`, cada linha é gravada no
+    disco antes de entrar na fila; as pendentes são reenviadas ao iniciar e, se um
+    lote esgotar as tentativas, ele volta à fila após ``reenvio_intervalo`` segundos.
+
+    Se ``metricas`` for informado, cada envio é registrado com
+    ``metricas.registrar_envio(duracao, linhas, sucesso)``.
+    """
+
+    def __init__(
+        self,
+        destino,
+        tamanho_lote: int = 20,
+        intervalo: float = 2.0,
+        tentativas: int = 5,
+        espera_inicial: float = 1.0,
+        caixa=None,
+        reenvio_intervalo: float = 60.0,
+        metricas=None,
+    ):
+        self.destino = destino
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.caixa = caixa
+        self.reenvio_intervalo = reenvio_intervalo
+        self.metricas = metricas
+        self._fila: asyncio.Queue | None = None
+        self._tarefa: asyncio.Task | None = None
+
+    @property
+    def pendentes(self) -> int:
+        return self._fila.qsize() if self._fila is not None else 0
+
+    async def iniciar(self) -> None:
+        self._fila = asyncio.Queue()
+        if self.caixa is not None:
+            pendentes = self.caixa.pendentes()
+            if pendentes:
+                logger.info(f"Reenviando {len(pendentes)} resultado(s) pendente(s) da caixa de saída")
+            for item in pendentes:
+                self._fila.put_nowait(item)
+        self._tarefa = asyncio.create_task(self._trabalhar())
+
+    async def parar(self) -> None:
+        """Grava o que ainda estiver na fila e encerra a tarefa."""
+        if self._tarefa is None:
+            return
+        await self._fila.put(None)
+        await self._tarefa
+        self._tarefa = None
+
+    async def enfileirar(self, linha: list) -> None:
+        id_ = self.caixa.registrar(linha) if self.caixa is not None else None
+        await self._fila.put((id_, linha))
+
+    async def _proximo_lote(self) -> tuple[list[tuple], bool]:
+        primeira = await self._fila.get()
+        if primeira is None:
+            return [], True
+        lote = [primeira]
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                linha = await asyncio.wait_for(self._fila.get(), restante)
+            except asyncio.TimeoutError:
+                break
+            if linha is None:
+                return lote, True
+            lote.append(linha)
+        return lote, False
+
+    async def _trabalhar(self) -> None:
+        encerrar = False
+        while not encerrar:
+            lote, encerrar = await self._proximo_lote()
+            if lote and not await self._gravar([linha for _, linha in lote]):
+                self._devolver(lote)
+                continue
+            if lote and self.caixa is not None:
+                self.caixa.confirmar([id_ for id_, _ in lote])
+
+    def _devolver(self, lote: list[tuple]) -> None:
+        if self.caixa is None:
+            logger.error(f"Lote de {len(lote)} linha(s) descartado após {self.tentativas} tentativas")
+            return
+        logger.error(
+            f"Lote de {len(lote)} linha(s) mantido na caixa de saída; "
+            f"nova tentativa em {self.reenvio_intervalo:.0f}s"
+        )
+        loop = asyncio.get_running_loop()
+        for item in lote:
+            loop.call_later(self.reenvio_intervalo, self._fila.put_nowait, item)
+
+    async def _gravar(self, linhas: list[list]) -> bool:
+        espera = self.espera_inicial
+        for tentativa in range(1, self.tentativas + 1):
+            inicio = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.destino.enviar, linhas)
+                self._medir(inicio, linhas, True)
+                return True
+            except Exception as e:
+                self._medir(inicio, linhas, False)
+                logger.warning(f"Falha ao gravar {len(linhas)} linha(s) (tentativa {tentativa}): {e}")
+                if tentativa < self.tentativas:
+                    await asyncio.sleep(espera)
+                    espera *= 2
+        return False
+
+    def _medir(self, inicio: float, linhas: list, sucesso: bool) -> None:
+        if self.metricas is not None:
+            self.metricas.registrar_envio(time.perf_counter() - inicio, len(linhas), sucesso)
@@ -0,0 +1,253 @@
+"""Pontuação vetorizada do questionário.
+
+O questionário vira uma matriz de pesos ``perguntas × opções × perfis`` e as
+respostas, uma matriz ``participantes × perguntas`` de índices de opção (uint8,
+com :data:`SEM_RESPOSTA` para perguntas em branco). Pontuar um participante ou
+milhões deles é a mesma chamada, sem laço por linha em Python.
+
+Por padrão cada opção vale 1 ponto para o perfil da sua letra; uma pergunta pode
+trazer ``"pesos": {"A": {"A": 1, "C": 0.5}, ...}`` no JSON para distribuir pesos
+diferentes. Empates são resolvidos pela política ``desempate`` do questionário:
+
+* ``ordem`` – vence o primeiro perfil em ``prioridade`` (padrão: ordem alfabética,
+  o comportamento histórico do bot);
+* ``ultima_resposta`` – vence, entre os empatados, o perfil favorecido pela
+  resposta mais recente que favoreça algum deles (``ordem`` como último recurso).
+
+Na planilha, as respostas ficam na forma compacta de :meth:`Pontuador.compactar`:
+uma letra por pergunta, na ordem, com ``-`` para perguntas em branco (por
+exemplo ``"ABDC-..."``). A forma antiga, ``"Q1:A, Q2:B, ..."``, continua sendo
+lida por :meth:`Pontuador.decodificar`. Cada linha da planilha traz data, nome,
+e-mail, telefone, idade, perfil, uma pontuação por perfil, as respostas e (nas
+linhas mais recentes) o ID do participante no Telegram.
+
+Para recalcular os resultados exportados da planilha com os pesos atuais::
+
+    python -m vocacional.pontuacao resultados.csv -o recalculado.csv
+"""
+import argparse
+import csv
+import logging
+import re
+import sys
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEM_RESPOSTA = 255
+EM_BRANCO = '-'
+COLUNA_PERFIL = 5
+DESEMPATES = ('ordem', 'ultima_resposta')
+
+_RESPOSTA_ROTULADA = re.compile(r'Q(\d+):([A-Za-z])')
+
+
+class Pontuador:
+    def __init__(self, pesos: np.ndarray, letras_opcoes: tuple, perfis: tuple,
+                 desempate: str = 'ordem', prioridade: str | None = None):
+        if desempate not in DESEMPATES:
+            raise ValueError(f"desempate desconhecido: {desempate!r}")
+        self.perfis = tuple(perfis)
+        self.letras_opcoes = tuple(tuple(letras) for letras in letras_opcoes)
+        self.desempate = desempate
+        self.prioridade = tuple(prioridade or self.perfis)
+        perguntas, opcoes, _ = pesos.shape
+        # Uma linha extra de zeros absorve as perguntas sem resposta.
+        self.pesos = np.zeros((perguntas, opcoes + 1, len(self.perfis)), dtype=np.float64)
+        self.pesos[:, :opcoes] = pesos
+        self._sem_resposta = opcoes
+        self._ordem = np.array([self.perfis.index(letra) for letra in self.prioridade], dtype=np.intp)
+        self._favorito = np.where(self.pesos.max(axis=2) > 0, self.pesos.argmax(axis=2), -1)
+        self._indices = [
+            {letra: indice for indice, letra in enumerate(letras)} for letras in self.letras_opcoes
+        ]
+        # Tabela byte -> índice de opção, por pergunta, para decodificar a forma compacta.
+        self._tabela = np.full((perguntas, 256), SEM_RESPOSTA, dtype=np.uint8)
+        for q, letras in enumerate(self.letras_opcoes):
+            for indice, letra in enumerate(letras):
+                self._tabela[q, ord(letra)] = self._tabela[q, ord(letra.lower())] = indice
+
+    @classmethod
+    def do_questionario(cls, perguntas, perfis, desempate: str = 'ordem', prioridade: str | None = None):
+        perfis = tuple(perfis)
+        letras_opcoes = tuple(tuple(opcao[0].upper() for opcao in p['opcoes']) for p in perguntas)
+        opcoes = max(len(letras) for letras in letras_opcoes)
+        pesos = np.zeros((len(perguntas), opcoes, len(perfis)), dtype=np.float64)
+        for q, (pergunta, letras) in enumerate(zip(perguntas, letras_opcoes)):
+            definidos = pergunta.get('pesos') or {}
+            for o, letra in enumerate(letras):
+                for perfil, peso in (definidos.get(letra) or {letra: 1}).items():
+                    pesos[q, o, perfis.index(perfil)] = peso
+        return cls(pesos, letras_opcoes, perfis, desempate, prioridade)
+
+    @property
+    def total_perguntas(self) -> int:
+        return self.pesos.shape[0]
+
+    def codificar(self, respostas) -> np.ndarray:
+        """Converte ``{indice: letra}`` (ou uma sequência de letras) em índices de opção."""
+        codigo = np.full(self.total_perguntas, SEM_RESPOSTA, dtype=np.uint8)
+        itens = respostas.items() if isinstance(respostas, dict) else enumerate(respostas)
+        for q, letra in itens:
+            indice = self._indices[int(q)].get(str(letra).upper()) if letra else None
+            if indice is not None:
+                codigo[int(q)] = indice
+        return codigo
+
+    def compactar(self, respostas) -> str:
+        """Forma compacta das respostas: uma letra por pergunta, ``-`` para as em branco."""
+        codigo = respostas if isinstance(respostas, np.ndarray) else self.codificar(respostas)
+        return ''.join(
+            EM_BRANCO if indice == SEM_RESPOSTA else letras[indice]
+            for letras, indice in zip(self.letras_opcoes, codigo.tolist())
+        )
+
+    def decodificar(self, textos) -> np.ndarray:
+        """Respostas ``(N, perguntas)`` a partir da coluna da planilha, compacta ou antiga.
+
+        As linhas compactas são decodificadas de uma só vez, por consulta à tabela de
+        bytes; só as linhas no formato antigo passam pela expressão regular.
+        """
+        textos = list(textos)
+        total = self.total_perguntas
+        respostas = np.full((len(textos), total), SEM_RESPOSTA, dtype=np.uint8)
+        compactas = [
+            i for i, texto in enumerate(textos)
+            if len(texto) == total and texto.isascii() and ':' not in texto
+        ]
+        if compactas:
+            bytes_ = np.frombuffer(''.join(textos[i] for i in compactas).encode('ascii'), dtype=np.uint8)
+            respostas[compactas] = self._tabela[np.arange(total), bytes_.reshape(-1, total)]
+        for i in sorted(set(range(len(textos))) - set(compactas)):
+            respostas[i] = self.codificar(decodificar_texto(textos[i], total))
+        return respostas
+
+    def pontuar(self, respostas: np.ndarray) -> np.ndarray:
+        """Pontuação ``(N, perfis)`` para respostas ``(N, perguntas)`` (ou ``(perguntas,)``)."""
+        respostas = np.asarray(respostas)
+        unico = respostas.ndim == 1
+        respostas = np.atleast_2d(respostas)
+        indices = np.where(respostas == SEM_RESPOSTA, self._sem_resposta, respostas).astype(np.intp)
+        pontos = np.zeros((respostas.shape[0], len(self.perfis)), dtype=np.float64)
+        for q in range(self.total_perguntas):
+            pontos += self.pesos[q, indices[:, q]]
+        return pontos[0] if unico else pontos
+
+    def classificar(self, pontos: np.ndarray, respostas: np.ndarray | None = None) -> np.ndarray:
+        """Índice do perfil vencedor de cada linha, aplicando a política de desempate."""
+        pontos = np.atleast_2d(pontos)
+        empatados = pontos == pontos.max(axis=1, keepdims=True)
+        vencedor = self._ordem[np.argmax(empatados[:, self._ordem], axis=1)]
+        if self.desempate != 'ultima_resposta' or respostas is None:
+            return vencedor
+
+        respostas = np.atleast_2d(respostas)
+        indices = np.where(respostas == SEM_RESPOSTA, self._sem_resposta, respostas).astype(np.intp)
+        favoritos = self._favorito[np.arange(self.total_perguntas), indices]
+        linhas = np.arange(pontos.shape[0])[:, None]
+        acerta = (favoritos >= 0) & empatados[linhas, np.maximum(favoritos, 0)]
+        ultima = acerta.shape[1] - 1 - np.argmax(acerta[:, ::-1], axis=1)
+        decide = acerta.any(axis=1) & (empatados.sum(axis=1) > 1)
+        return np.where(decide, favoritos[np.arange(pontos.shape[0]), ultima], vencedor)
+
+    def resultado(self, respostas) -> tuple[str, dict]:
+        """Perfil e pontuação de um único participante."""
+        codigo = self.codificar(respostas)
+        pontos = self.pontuar(codigo)
+        perfil = self.perfis[int(self.classificar(pontos, codigo)[0])]
+        return perfil, {letra: _numero(valor) for letra, valor in zip(self.perfis, pontos)}
+
+
+def _numero(valor: float):
+    return int(valor) if float(valor).is_integer() else round(float(valor), 2)
+
+
+def decodificar_texto(texto: str, total: int) -> list:
+    """Lê a forma antiga da coluna de respostas (``"Q1:A, Q2:B, ..."``) como lista de letras."""
+    letras = [None] * total
+    for numero, letra in _RESPOSTA_ROTULADA.findall(texto or ''):
+        indice = int(numero) - 1
+        if 0 <= indice < total:
+            letras[indice] = letra.upper()
+    return letras
+
+
+def coluna_respostas(pontuador: Pontuador, coluna_perfil: int = COLUNA_PERFIL) -> int:
+    """Índice da coluna de respostas na planilha, logo após o perfil e as pontuações."""
+    return coluna_perfil + 1 + len(pontuador.perfis)
+
+
+def _eh_cabecalho(linha: list, coluna: int, pontuador: Pontuador) -> bool:
+    """A primeira linha do CSV é cabeçalho se a coluna de respostas não tiver nenhuma resposta."""
+    texto = linha[coluna] if coluna < len(linha) else ''
+    return not (pontuador.decodificar([texto]) != SEM_RESPOSTA).any()
+
+
+def ler_csv(caminho: str, coluna_respostas: int, pontuador: Pontuador) -> tuple[list, list]:
+    """Linhas de um CSV exportado da planilha, separando o cabeçalho (se houver).
+
+    Linhas curtas demais para ter a coluna de respostas são ignoradas (e registradas no log).
+    """
+    with open(caminho, newline='', encoding='utf-8') as arquivo:
+        linhas = [linha for linha in csv.reader(arquivo) if linha]
+    cabecalho = []
+    if linhas and _eh_cabecalho(linhas[0], coluna_respostas, pontuador):
+        cabecalho, linhas = [linhas[0]], linhas[1:]
+    completas = []
+    for numero, linha in enumerate(linhas, len(cabecalho) + 1):
+        if coluna_respostas < len(linha):
+            completas.append(linha)
+        else:
+            logger.warning(f"{caminho}: linha {numero} ignorada, com {len(linha)} coluna(s) e sem a de respostas")
+    return cabecalho, completas
+
+
+def main(argv=None) -> int:
+    from .questionario import CAMINHO_PADRAO, carregar
+
+    parser = argparse.ArgumentParser(prog='python -m vocacional.pontuacao', description=__doc__.splitlines()[0])
+    parser.add_argument('entrada', help='CSV exportado da planilha de respostas')
+    parser.add_argument('-o', '--saida', help='CSV recalculado (padrão: saída padrão)')
+    parser.add_argument('--questionario', default=CAMINHO_PADRAO)
+    parser.add_argument('--desempate', choices=DESEMPATES, help='sobrepõe a política do questionário')
+    parser.add_argument(
+        '--coluna-perfil', type=int, default=COLUNA_PERFIL, help='coluna do perfil (as pontuações vêm logo após)'
+    )
+    parser.add_argument('--coluna-respostas', type=int, help='coluna das respostas (padrão: após as pontuações)')
+    args = parser.parse_args(argv)
+
+    questionario = carregar(args.questionario)
+    pontuador = questionario.pontuador
+    if args.desempate:
+        pontuador = Pontuador(
+            pontuador.pesos[:, :-1], pontuador.letras_opcoes, pontuador.perfis, args.desempate, pontuador.prioridade
+        )
+
+    if args.coluna_respostas is None:
+        args.coluna_respostas = coluna_respostas(pontuador, args.coluna_perfil)
+    cabecalho, linhas = ler_csv(args.entrada, args.coluna_respostas, pontuador)
+
+    respostas = pontuador.decodificar(linha[args.coluna_respostas] for linha in linhas)
+    pontos = pontuador.pontuar(respostas)
+    vencedores = pontuador.classificar(pontos, respostas)
+
+    alterados = 0
+    inicio = args.coluna_perfil
+    for linha, vencedor, valores in zip(linhas, vencedores, pontos):
+        perfil = pontuador.perfis[vencedor]
+        alterados += linha[inicio] != perfil
+        linha[inicio:inicio + 1 + len(valores)] = [perfil, *(_numero(valor) for valor in valores)]
+
+    saida = open(args.saida, 'w', newline='', encoding='utf-8') if args.saida else sys.stdout
+    try:
+        csv.writer(saida).writerows(cabecalho + linhas)
+    finally:
+        if args.saida:
+            saida.close()
+    print(f"{len(linhas)} resultado(s) recalculado(s), {alterados} com perfil alterado.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Processamento concorrente de atualizações, em ordem dentro de cada chat.
+
+:class:`ProcessadorPorChat` deixa atualizações de chats diferentes rodarem em
+paralelo no loop de eventos (até ``max_concurrent_updates``, limitadas pelo
+semáforo do ``BaseUpdateProcessor``), mas cada chat tem uma trava própria, obtida
+em ``do_process_update``: as atualizações de um chat são tratadas uma de cada
+vez, na ordem de chegada. Assim o estado do ``ConversationHandler`` de um
+participante nunca é alterado por duas atualizações ao mesmo tempo. Uma
+atualização esperando a trava do seu chat ocupa uma vaga do semáforo; com
+participantes humanos, raramente há mais de uma por chat.
+
+:class:`FilaLimitada` é a ``update_queue`` do ``Application`` com contrapressão:
+``put`` espera enquanto houver ``limite`` atualizações recebidas e ainda não
+concluídas. Quem entrega as atualizações (o servidor do webhook ou o ``Updater``
+do polling) desacelera junto com o bot, em vez de acumular tarefas na memória.
+"""
+import asyncio
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ProcessadorPorChat(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # chave -> [trava, atualizações usando ou esperando a trava]
+        self._travas: dict = {}
+
+    @property
+    def chats_ativos(self) -> int:
+        return len(self._travas)
+
+    def ocupado(self, chat_id: int) -> bool:
+        """Se o chat tem atualizações em processamento ou esperando a trava do chat."""
+        return chat_id in self._travas
+
+    @staticmethod
+    def _chave(update: object):
+        if isinstance(update, Update):
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+            if update.effective_user is not None:
+                return ('usuario', update.effective_user.id)
+        return None
+
+    async def do_process_update(self, update: object, coroutine) -> None:
+        # Chamado já dentro do semáforo do BaseUpdateProcessor.
+        chave = self._chave(update)
+        if chave is None:
+            await coroutine
+            return
+        entrada = self._travas.get(chave)
+        if entrada is None:
+            entrada = self._travas[chave] = [asyncio.Lock(), 0]
+        entrada[1] += 1
+        try:
+            async with entrada[0]:
+                await coroutine
+        finally:
+            entrada[1] -= 1
+            if not entrada[1]:
+                del self._travas[chave]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+class FilaLimitada(asyncio.Queue):
+    def __init__(self, limite: int):
+        super().__init__()
+        self.limite = limite
+        self.em_andamento = 0
+        self._esperas: deque = deque()
+
+    async def put(self, item) -> None:
+        while self.em_andamento >= self.limite:
+            espera = asyncio.get_running_loop().create_future()
+            self._esperas.append(espera)
+            try:
+                await espera
+            except asyncio.CancelledError:
+                # Repassa a vaga, se ela chegou junto com o cancelamento.
+                if espera.done() and not espera.cancelled():
+                    self._liberar()
+                raise
+        self.em_andamento += 1
+        self.put_nowait(item)
+
+    def task_done(self) -> None:
+        super().task_done()
+        self.em_andamento = max(0, self.em_andamento - 1)
+        self._liberar()
+
+    def _liberar(self) -> None:
+        while self._esperas:
+            espera = self._esperas.popleft()
+            if not espera.done():
+                espera.set_result(None)
+                return
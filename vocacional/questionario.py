@@ -0,0 +1,248 @@
+"""Questionário compilado a partir de um arquivo JSON versionado.
+
+O arquivo traz ``versao``, ``perguntas`` (``numero``, ``pergunta`` e ``opcoes``,
+cada opção começando pela letra do perfil, como ``"a) ..."``) e ``perfis``
+(``titulo``, ``descricao`` e ``carreiras`` por letra). Opcionalmente, cada
+pergunta pode trazer ``pesos`` e o arquivo, ``desempate`` e ``prioridade`` (ver
+:mod:`vocacional.pontuacao`). Ao compilar, os botões, os textos das perguntas
+(com e sem barra de progresso), os textos de resultado e a matriz de pesos são
+montados uma única vez, e responder uma pergunta passa a ser apenas uma consulta
+por índice.
+
+O ``callback_data`` de cada botão leva a sessão do teste, o índice da pergunta e
+a letra (``"<sessao>:<pergunta>:<letra>"``), para que cliques repetidos ou em
+teclados antigos possam ser descartados sem tocar no estado do participante.
+"""
+import json
+import logging
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from .pontuacao import DESEMPATES, Pontuador
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(__file__), 'questionario.json')
+
+ESQUEMA_VERSOES = """
+CREATE TABLE IF NOT EXISTS questionarios (
+    versao TEXT PRIMARY KEY,
+    fonte TEXT NOT NULL
+);
+"""
+
+RODAPE_RESULTADO = (
+    "\n✨ Lembre-se: Este é apenas um guia! Você pode explorar diferentes áreas "
+    "e descobrir novos interesses ao longo da sua jornada profissional.\n\n"
+    "Obrigado por participar! 🚀"
+)
+
+
+class QuestionarioInvalido(ValueError):
+    """O arquivo do questionário não tem a estrutura esperada."""
+
+
+@dataclass(frozen=True)
+class Questionario:
+    versao: str
+    perguntas: tuple
+    perfis: MappingProxyType
+    letras: tuple
+    botoes: tuple = field(repr=False)
+    textos_pergunta: tuple = field(repr=False)
+    textos_progresso: tuple = field(repr=False)
+    pontuador: Pontuador = field(repr=False)
+    _resultados: MappingProxyType = field(repr=False)
+    fonte: str = field(repr=False)
+
+    @property
+    def total(self) -> int:
+        return len(self.perguntas)
+
+    def teclado(self, indice: int, sessao: str) -> InlineKeyboardMarkup:
+        # Rótulos e sufixos ``:<pergunta>:<letra>`` vêm prontos; só a sessão muda a cada envio.
+        return InlineKeyboardMarkup(
+            tuple(
+                (InlineKeyboardButton(texto, callback_data=sessao + sufixo),) for texto, sufixo in self.botoes[indice]
+            )
+        )
+
+    def texto_resultado(self, perfil: str, pontuacao: dict) -> str:
+        cabecalho, corpo = self._resultados[perfil]
+        placar = ' | '.join(f"{letra}: {pontuacao[letra]}" for letra in self.letras)
+        return f"{cabecalho}{placar}{corpo}"
+
+
+def ler_botao(dados: str) -> tuple[str | None, int | None, str]:
+    """Sessão, pergunta e letra de um ``callback_data``.
+
+    Botões no formato antigo (``"resp_A"``), de testes iniciados antes da sessão
+    existir, não trazem sessão nem pergunta.
+    """
+    if dados.startswith('resp_'):
+        return None, None, dados[5:]
+    sessao, _, resto = dados.partition(':')
+    pergunta, _, letra = resto.partition(':')
+    return sessao, int(pergunta) if pergunta.isdigit() else -1, letra
+
+
+def _exigir(condicao, mensagem: str) -> None:
+    if not condicao:
+        raise QuestionarioInvalido(mensagem)
+
+
+def _validar(dados) -> None:
+    _exigir(isinstance(dados, dict), "o questionário deve ser um objeto JSON")
+    _exigir(isinstance(dados.get('versao'), str) and dados['versao'].strip(), "campo 'versao' ausente")
+
+    perfis = dados.get('perfis')
+    _exigir(isinstance(perfis, dict) and perfis, "campo 'perfis' ausente ou vazio")
+    for letra, perfil in perfis.items():
+        _exigir(len(letra) == 1 and letra.isalpha() and letra.isupper(), f"perfil inválido: {letra!r}")
+        _exigir(isinstance(perfil, dict), f"perfil {letra} deve ser um objeto")
+        for chave in ('titulo', 'descricao'):
+            _exigir(isinstance(perfil.get(chave), str) and perfil[chave], f"perfil {letra} sem '{chave}'")
+        _exigir(isinstance(perfil.get('carreiras'), list), f"perfil {letra} sem 'carreiras'")
+
+    perguntas = dados.get('perguntas')
+    _exigir(isinstance(perguntas, list) and perguntas, "campo 'perguntas' ausente ou vazio")
+    for indice, pergunta in enumerate(perguntas, 1):
+        _exigir(isinstance(pergunta, dict), f"pergunta {indice} deve ser um objeto")
+        _exigir(pergunta.get('numero') == indice, f"pergunta {indice} com 'numero' fora de ordem")
+        _exigir(isinstance(pergunta.get('pergunta'), str) and pergunta['pergunta'], f"pergunta {indice} sem texto")
+        opcoes = pergunta.get('opcoes')
+        _exigir(isinstance(opcoes, list) and len(opcoes) >= 2, f"pergunta {indice} precisa de ao menos 2 opções")
+        letras = [opcao[:1].upper() for opcao in opcoes if isinstance(opcao, str)]
+        _exigir(len(letras) == len(opcoes), f"pergunta {indice} com opção que não é texto")
+        _exigir(len(set(letras)) == len(letras), f"pergunta {indice} com letras repetidas")
+        for letra in letras:
+            _exigir(letra in perfis, f"pergunta {indice}: opção '{letra}' não corresponde a nenhum perfil")
+        pesos = pergunta.get('pesos', {})
+        _exigir(isinstance(pesos, dict), f"pergunta {indice}: 'pesos' deve ser um objeto")
+        for letra, distribuicao in pesos.items():
+            _exigir(letra in letras, f"pergunta {indice}: pesos para a opção inexistente '{letra}'")
+            _exigir(
+                isinstance(distribuicao, dict)
+                and all(p in perfis and isinstance(v, (int, float)) for p, v in distribuicao.items()),
+                f"pergunta {indice}: pesos da opção '{letra}' devem ser {{perfil: número}}",
+            )
+
+    _exigir(dados.get('desempate', 'ordem') in DESEMPATES, f"'desempate' deve ser um de {', '.join(DESEMPATES)}")
+    prioridade = dados.get('prioridade')
+    if prioridade is not None:
+        _exigir(
+            isinstance(prioridade, str) and sorted(prioridade) == sorted(perfis),
+            "'prioridade' deve listar cada perfil exatamente uma vez",
+        )
+
+
+def _texto_resultado(perfil: dict) -> tuple[str, str]:
+    cabecalho = (
+        f"🎉 TESTE CONCLUÍDO! 🎉\n\n"
+        f"{perfil['titulo']}\n\n"
+        f"📊 Sua pontuação:\n"
+    )
+    carreiras = ''.join(f"{i}. {carreira}\n" for i, carreira in enumerate(perfil['carreiras'], 1))
+    corpo = (
+        f"\n\n📝 Descrição do seu perfil:\n{perfil['descricao']}\n\n"
+        f"💼 Carreiras sugeridas:\n"
+        f"{carreiras}"
+        f"{RODAPE_RESULTADO}"
+    )
+    return cabecalho, corpo
+
+
+def _barra_progresso(respondidas: int, total: int, largura: int = 10) -> str:
+    cheios = round(largura * respondidas / total)
+    return '▰' * cheios + '▱' * (largura - cheios)
+
+
+def compilar(dados: dict) -> Questionario:
+    """Valida os dados do questionário e pré-calcula botões e textos."""
+    _validar(dados)
+    perguntas = tuple(MappingProxyType(dict(p, opcoes=tuple(p['opcoes']))) for p in dados['perguntas'])
+    total = len(perguntas)
+    botoes = tuple(
+        tuple((opcao, f":{indice}:{opcao[0].upper()}") for opcao in p['opcoes']) for indice, p in enumerate(perguntas)
+    )
+    textos = tuple(f"Pergunta {p['numero']}/{total}\n\n{p['pergunta']}" for p in perguntas)
+    progresso = tuple(
+        f"{_barra_progresso(p['numero'] - 1, total)} Pergunta {p['numero']}/{total}\n\n{p['pergunta']}"
+        for p in perguntas
+    )
+    perfis = MappingProxyType({letra: MappingProxyType(perfil) for letra, perfil in dados['perfis'].items()})
+    return Questionario(
+        versao=dados['versao'],
+        perguntas=perguntas,
+        perfis=perfis,
+        letras=tuple(sorted(perfis)),
+        botoes=botoes,
+        textos_pergunta=textos,
+        textos_progresso=progresso,
+        pontuador=Pontuador.do_questionario(
+            perguntas, sorted(perfis), dados.get('desempate', 'ordem'), dados.get('prioridade')
+        ),
+        _resultados=MappingProxyType({letra: _texto_resultado(perfil) for letra, perfil in perfis.items()}),
+        fonte=json.dumps(dados, ensure_ascii=False, sort_keys=True, separators=(',', ':')),
+    )
+
+
+def carregar(caminho: str = CAMINHO_PADRAO) -> Questionario:
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except json.JSONDecodeError as e:
+        raise QuestionarioInvalido(f"JSON inválido: {e}") from e
+    return compilar(dados)
+
+
+class RepositorioQuestionario:
+    """Guarda a versão vigente e as anteriores ainda usadas por testes em andamento.
+
+    :meth:`trocar` publica uma nova versão sem reiniciar o bot; quem já começou o
+    teste continua na versão em que começou (ver :meth:`obter`). Por isso uma
+    versão, uma vez carregada, não muda de conteúdo. Com ``caminho``, cada versão
+    carregada é gravada num arquivo SQLite e volta a estar disponível depois de
+    uma reinicialização.
+    """
+
+    def __init__(self, atual: Questionario, caminho: str | None = None):
+        self.atual = atual
+        self._versoes: dict[str, Questionario] = {}
+        self._conexao = None
+        if caminho:
+            self._conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+            self._conexao.executescript(ESQUEMA_VERSOES)
+            for versao, fonte in self._conexao.execute('SELECT versao, fonte FROM questionarios'):
+                try:
+                    self._versoes[versao] = compilar(json.loads(fonte))
+                except ValueError as e:
+                    logger.error(f"Questionário versão {versao} gravado não pôde ser compilado: {e}")
+        self.trocar(atual)
+
+    def obter(self, versao: str | None = None) -> Questionario | None:
+        """A versão pedida (a vigente, para testes anteriores ao versionamento) ou ``None``, se não existe mais."""
+        if versao is None:
+            return self.atual
+        questionario = self._versoes.get(versao)
+        if questionario is None:
+            logger.warning(f"Questionário versão {versao} indisponível")
+        return questionario
+
+    def trocar(self, novo: Questionario) -> Questionario:
+        """Publica ``novo``; recusa uma versão já carregada com outro conteúdo."""
+        existente = self._versoes.get(novo.versao)
+        if existente is not None and existente.fonte != novo.fonte:
+            raise QuestionarioInvalido(
+                f"a versão {novo.versao} já foi carregada com outro conteúdo; altere o campo 'versao'"
+            )
+        if existente is None and self._conexao is not None:
+            self._conexao.execute('INSERT INTO questionarios (versao, fonte) VALUES (?, ?)', (novo.versao, novo.fonte))
+        anterior = self.atual
+        self._versoes[novo.versao] = novo
+        self.atual = novo
+        return anterior
@@ -0,0 +1,189 @@
+"""Índice local do último resultado de cada participante.
+
+Um arquivo SQLite com uma linha por ID do Telegram (perfil, pontuação, versão do
+questionário e data), atualizado a cada teste concluído. ``/meuresultado``
+responde com uma consulta pela chave primária, sem ler a planilha.
+
+O índice pode ser reconstruído a partir do CSV exportado da planilha. Linhas
+anteriores ao índice não têm a coluna com o ID do participante; essas são
+indexadas pelo e-mail e telefone do cadastro, e ``obter`` as encontra pelos dados
+que o participante informou ao bot (``user_data``), passando a guardá-las também
+pelo ID. Uso pela linha de comando::
+
+    python -m vocacional.resultados reconstruir resultados.csv
+    python -m vocacional.resultados consultar 123456789
+"""
+import argparse
+import json
+import logging
+import re
+import sqlite3
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    user_id INTEGER PRIMARY KEY,
+    instante INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    perfil TEXT NOT NULL,
+    pontuacao TEXT NOT NULL,
+    versao TEXT
+);
+CREATE TABLE IF NOT EXISTS resultados_contato (
+    contato TEXT PRIMARY KEY,
+    instante INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    perfil TEXT NOT NULL,
+    pontuacao TEXT NOT NULL,
+    versao TEXT
+);
+"""
+
+# Reconstruções podem trazer linhas fora de ordem: só substitui por um resultado mais novo.
+GRAVAR = """
+INSERT INTO resultados (user_id, instante, data, perfil, pontuacao, versao)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    instante = excluded.instante,
+    data = excluded.data,
+    perfil = excluded.perfil,
+    pontuacao = excluded.pontuacao,
+    versao = excluded.versao
+WHERE excluded.instante >= resultados.instante
+"""
+
+GRAVAR_CONTATO = """
+INSERT INTO resultados_contato (contato, instante, data, perfil, pontuacao, versao)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (contato) DO UPDATE SET
+    instante = excluded.instante,
+    data = excluded.data,
+    perfil = excluded.perfil,
+    pontuacao = excluded.pontuacao,
+    versao = excluded.versao
+WHERE excluded.instante >= resultados_contato.instante
+"""
+
+
+def _instante(data: str) -> int:
+    try:
+        return int(datetime.strptime(data.strip(), FORMATO_DATA).timestamp())
+    except ValueError:
+        return 0
+
+
+def _numero(texto: str):
+    valor = float(str(texto).replace(',', '.'))
+    return int(valor) if valor.is_integer() else valor
+
+
+def contato(email: str | None, telefone: str | None) -> str | None:
+    """E-mail e telefone juntos: só o e-mail não basta para ver o resultado de outra pessoa."""
+    email = (email or '').strip().lower()
+    telefone = re.sub(r'\D', '', telefone or '')
+    if not email or not telefone:
+        return None
+    return f'{email}|{telefone}'
+
+
+class IndiceResultados:
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._conexao = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+        self._conexao.execute('PRAGMA journal_mode=WAL')
+        self._conexao.execute('PRAGMA synchronous=NORMAL')
+        self._conexao.executescript(ESQUEMA)
+
+    def registrar(self, user_id: int, data: str, perfil: str, pontuacao: dict, versao: str | None = None) -> None:
+        self._conexao.execute(
+            GRAVAR,
+            (user_id, _instante(data), data, perfil, json.dumps(pontuacao, ensure_ascii=False), versao),
+        )
+
+    def obter(self, user_id: int, email: str | None = None, telefone: str | None = None) -> dict | None:
+        """Resultado pelo ID ou, para testes anteriores ao índice, pelo e-mail e telefone do cadastro."""
+        linha = self._conexao.execute(
+            'SELECT instante, data, perfil, pontuacao, versao FROM resultados WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if linha is None and (chave := contato(email, telefone)) is not None:
+            linha = self._conexao.execute(
+                'SELECT instante, data, perfil, pontuacao, versao FROM resultados_contato WHERE contato = ?', (chave,)
+            ).fetchone()
+            if linha is not None:
+                self._conexao.execute(GRAVAR, (user_id, *linha))
+        if linha is None:
+            return None
+        _, data, perfil, pontuacao, versao = linha
+        return {'data': data, 'perfil': perfil, 'pontuacao': json.loads(pontuacao), 'versao': versao}
+
+    def reconstruir(
+        self, linhas: list, perfis: tuple, coluna_perfil: int, coluna_usuario: int
+    ) -> tuple[int, int, int]:
+        """Grava as linhas exportadas da planilha; devolve (pelo ID, pelo contato, ignoradas)."""
+        por_id, por_contato = [], []
+        for linha in linhas:
+            try:
+                valores = linha[coluna_perfil + 1:coluna_perfil + 1 + len(perfis)]
+                pontuacao = {letra: _numero(valor) for letra, valor in zip(perfis, valores, strict=True)}
+            except ValueError:
+                continue
+            data = linha[0]
+            registro = (_instante(data), data, linha[coluna_perfil], json.dumps(pontuacao, ensure_ascii=False), None)
+            try:
+                por_id.append((int(linha[coluna_usuario]), *registro))
+            except (IndexError, ValueError):
+                chave = contato(linha[2], linha[3])
+                if chave is not None:
+                    por_contato.append((chave, *registro))
+        with self._conexao:
+            self._conexao.execute('BEGIN')
+            self._conexao.executemany(GRAVAR, por_id)
+            self._conexao.executemany(GRAVAR_CONTATO, por_contato)
+        return len(por_id), len(por_contato), len(linhas) - len(por_id) - len(por_contato)
+
+    def contagem(self) -> int:
+        return self._conexao.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+
+    def fechar(self) -> None:
+        self._conexao.close()
+
+
+def main(argv=None):
+    from .config import Configuracao
+    from .pontuacao import COLUNA_PERFIL, coluna_respostas, ler_csv
+    from .questionario import carregar
+
+    config = Configuracao.do_ambiente()
+    parser = argparse.ArgumentParser(prog='python -m vocacional.resultados', description=__doc__.splitlines()[0])
+    parser.add_argument('--arquivo', default=config.indice_resultados, help='arquivo SQLite do índice')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    reconstrucao = comandos.add_parser('reconstruir', help='grava no índice os resultados de um CSV da planilha')
+    reconstrucao.add_argument('entrada', help='CSV exportado da planilha de respostas')
+    reconstrucao.add_argument('--questionario', default=config.questionario)
+    consulta = comandos.add_parser('consultar', help='mostra o resultado indexado de um participante')
+    consulta.add_argument('user_id', type=int)
+    args = parser.parse_args(argv)
+
+    indice = IndiceResultados(args.arquivo)
+    try:
+        if args.comando == 'reconstruir':
+            pontuador = carregar(args.questionario).pontuador
+            coluna = coluna_respostas(pontuador)
+            _, linhas = ler_csv(args.entrada, coluna, pontuador)
+            por_id, por_contato, ignoradas = indice.reconstruir(linhas, pontuador.perfis, COLUNA_PERFIL, coluna + 1)
+            print(
+                f"{por_id} linha(s) indexada(s) pelo ID, {por_contato} pelo e-mail e telefone, "
+                f"{ignoradas} ignorada(s); {indice.contagem()} participante(s) no índice."
+            )
+        elif args.comando == 'consultar':
+            print(indice.obter(args.user_id) or 'Nenhum resultado.')
+    finally:
+        indice.fechar()
+
+
+if __name__ == '__main__':
+    main()
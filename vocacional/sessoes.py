@@ -0,0 +1,198 @@
+"""Expiração de sessões abandonadas.
+
+Cada atualização marca o usuário como ativo numa lista em ordem de uso
+(``OrderedDict``, O(1) por atualização). Uma tarefa em segundo plano expira, a
+cada ``intervalo`` segundos, quem está parado há mais de ``ttl`` segundos; e,
+se houver mais de ``maximo`` sessões vivas, as menos usadas recentemente são
+expiradas na hora. Na inicialização, todo usuário com ``user_data`` gravado entra
+na lista com o instante da última gravação, inclusive quem já concluiu o teste.
+
+Expirar uma sessão descarta o ``user_data`` do participante (na memória e na
+persistência) e encerra a conversa: o gerenciador passa ao ``ConversationHandler``
+uma atualização interna que só ``EncerrarSessao``, o primeiro handler de cada
+estado, atende, devolvendo ``ConversationHandler.END``; a linha da conversa é
+apagada da persistência na mesma hora. ``SessaoExpirada`` cobre o participante
+que volta a uma conversa cujos dados sumiram por outro caminho.
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import Application, BaseHandler, ContextTypes, ConversationHandler
+
+logger = logging.getLogger(__name__)
+
+
+class SessaoExpirada(BaseHandler):
+    """Atende, num estado da conversa, quem não tem mais ``chave`` no ``user_data``.
+
+    O ``user_data`` já está carregado quando o handler é consultado: o
+    ``TypeHandler`` do grupo -1 (``GerenciadorSessoes.registrar``) o carrega antes.
+    """
+
+    def __init__(self, application: Application, chave: str, callback):
+        super().__init__(callback)
+        self.application = application
+        self.chave = chave
+
+    def check_update(self, update: object) -> bool:
+        if not isinstance(update, Update) or update.effective_user is None:
+            return False
+        return self.chave not in self.application.user_data.get(update.effective_user.id, {})
+
+
+class _Encerramento(Update):
+    """Atualização interna com que o ``GerenciadorSessoes`` encerra uma conversa."""
+
+    __slots__ = ()
+
+
+class EncerrarSessao(BaseHandler):
+    """Atende só as atualizações de encerramento do ``GerenciadorSessoes``.
+
+    Deve ser o primeiro handler de cada estado do ``ConversationHandler``.
+    """
+
+    def __init__(self):
+        super().__init__(self._encerrar)
+
+    def check_update(self, update: object) -> bool:
+        return isinstance(update, _Encerramento)
+
+    @staticmethod
+    async def _encerrar(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        return ConversationHandler.END
+
+
+class GerenciadorSessoes:
+    def __init__(
+        self,
+        application: Application,
+        conversas: ConversationHandler,
+        ttl: float = 86400,
+        maximo: int = 10000,
+        intervalo: float = 60,
+        processador=None,
+    ):
+        self.application = application
+        self.conversas = conversas
+        self.ttl = ttl
+        self.maximo = maximo
+        self.intervalo = intervalo
+        self.processador = processador
+        # user_id -> (chat_id, última atividade), do menos para o mais recente.
+        self._atividade: OrderedDict[int, tuple[int | None, float]] = OrderedDict()
+        self.expiradas: Counter = Counter()
+        self._tarefa: asyncio.Task | None = None
+
+    @property
+    def ativas(self) -> int:
+        return len(self._atividade)
+
+    async def iniciar(self) -> None:
+        persistencia = self.application.persistence
+        if persistencia is not None:
+            conversas = await persistencia.get_conversations(self.conversas.name)
+            chats = {chave[1]: chave[0] for chave in conversas if len(chave) == 2}
+            agora, relogio = time.monotonic(), time.time()
+            # Gravações sem instante (anteriores à coluna) e conversas sem user_data
+            # gravado contam como feitas agora.
+            vistos = dict.fromkeys(chats, agora)
+            vistos.update(
+                (user_id, agora - max(0.0, relogio - visto) if visto else agora)
+                for user_id, visto in persistencia.usuarios_salvos().items()
+            )
+            for user_id in sorted(vistos, key=vistos.get):
+                self._atividade[user_id] = (chats.get(user_id), vistos[user_id])
+        self._tarefa = asyncio.create_task(self._varrer())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+    async def registrar(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """``TypeHandler`` do grupo -1: registra a atividade antes dos demais handlers."""
+        if update.effective_user is None or update.effective_chat is None:
+            return
+        user_id = update.effective_user.id
+        self._atividade[user_id] = (update.effective_chat.id, time.monotonic())
+        self._atividade.move_to_end(user_id)
+        if len(self._atividade) > self.maximo:
+            await self._expirar_excedentes(poupar=user_id)
+
+    def _ocupado(self, chat_id: int | None) -> bool:
+        return chat_id is not None and self.processador is not None and self.processador.ocupado(chat_id)
+
+    async def _encerrar_conversa(self, user_id: int, chat_id: int) -> None:
+        atualizacao = _Encerramento(
+            0,
+            message=Message(
+                0, datetime.now(timezone.utc), Chat(chat_id, Chat.PRIVATE), from_user=User(user_id, '', False)
+            ),
+        )
+        verificacao = self.conversas.check_update(atualizacao)
+        # Sem conversa ativa para a chave, nenhum handler (nem de entrada) deve atendê-la.
+        if verificacao and isinstance(verificacao[2], EncerrarSessao):
+            contexto = self.application.context_types.context.from_update(atualizacao, self.application)
+            await self.conversas.handle_update(atualizacao, self.application, verificacao, contexto)
+
+    async def _expirar(self, user_id: int, motivo: str) -> None:
+        chat_id, _ = self._atividade.pop(user_id)
+        self.application.drop_user_data(user_id)
+        if chat_id is not None:
+            await self._encerrar_conversa(user_id, chat_id)
+        persistencia = self.application.persistence
+        if persistencia is not None:
+            # O Application só repassa as mudanças na próxima gravação; até lá, uma
+            # atualização do participante recarregaria os dados do arquivo.
+            await persistencia.drop_user_data(user_id)
+            if chat_id is not None:
+                await persistencia.update_conversation(self.conversas.name, (chat_id, user_id), None)
+        self.expiradas[motivo] += 1
+
+    async def _expirar_excedentes(self, poupar: int | None = None) -> None:
+        excesso = len(self._atividade) - self.maximo
+        vitimas = []
+        for user_id, (chat_id, _) in self._atividade.items():
+            if len(vitimas) >= excesso:
+                break
+            if user_id != poupar and not self._ocupado(chat_id):
+                vitimas.append(user_id)
+        for user_id in vitimas:
+            await self._expirar(user_id, 'limite')
+
+    async def varrer(self) -> int:
+        """Expira as sessões paradas há mais de ``ttl`` segundos; devolve quantas."""
+        antes = sum(self.expiradas.values())
+        if self.ttl:
+            limite = time.monotonic() - self.ttl
+            vencidas = []
+            for user_id, (chat_id, visto) in self._atividade.items():
+                if visto > limite:
+                    break
+                if not self._ocupado(chat_id):
+                    vencidas.append(user_id)
+            for user_id in vencidas:
+                await self._expirar(user_id, 'inatividade')
+        if len(self._atividade) > self.maximo:
+            await self._expirar_excedentes()
+        return sum(self.expiradas.values()) - antes
+
+    async def _varrer(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                expiradas = await self.varrer()
+            except Exception as e:
+                logger.error(f"Erro ao expirar sessões: {e}")
+                continue
+            if expiradas:
+                logger.info(f"{expiradas} sessão(ões) expirada(s); {self.ativas} ativa(s)")
@@ -0,0 +1,91 @@
+"""Modo webhook do bot, servido por um servidor aiohttp embutido.
+
+O Telegram envia cada atualização por POST para ``WEBHOOK_URL``; o pedido só é
+aceito com o cabeçalho ``X-Telegram-Bot-Api-Secret-Token`` correto (sem
+``WEBHOOK_SECRET``, um segredo aleatório é gerado a cada inicialização e
+registrado no ``set_webhook``) e a
+atualização vai direto para a ``update_queue`` do ``Application`` (que pode segurar
+a resposta enquanto o bot estiver sobrecarregado, ver
+:class:`~vocacional.processador.FilaLimitada`). Ao receber
+SIGINT/SIGTERM, o servidor para de aceitar pedidos, as atualizações já recebidas
+são processadas até o fim e só então o bot é encerrado.
+"""
+import asyncio
+import hmac
+import logging
+import secrets
+import signal
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+CABECALHO_SEGREDO = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class ServidorWebhook:
+    def __init__(self, application: Application, segredo: str, caminho: str = '/telegram'):
+        if not segredo:
+            raise ValueError("o webhook precisa de um segredo")
+        self.application = application
+        self.segredo = segredo
+        self.caminho = caminho
+        self.aceitando = True
+        self.app = web.Application()
+        self.app.router.add_post(caminho, self.receber)
+
+    async def receber(self, request: web.Request) -> web.Response:
+        if not self.aceitando:
+            return web.Response(status=503)
+        if not hmac.compare_digest(request.headers.get(CABECALHO_SEGREDO, ''), self.segredo):
+            return web.Response(status=403)
+        try:
+            dados = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        update = Update.de_json(dados, self.application.bot)
+        await self.application.update_queue.put(update)
+        return web.Response()
+
+
+async def _executar(application: Application, config) -> None:
+    segredo = config.webhook_segredo
+    if not segredo:
+        segredo = secrets.token_urlsafe(32)
+        logger.warning("WEBHOOK_SECRET não definido: usando um segredo aleatório gerado nesta inicialização")
+    servidor = ServidorWebhook(application, segredo, config.webhook_caminho)
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sinal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sinal, parar.set)
+
+    runner = web.AppRunner(servidor.app)
+    await runner.setup()
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        await application.bot.set_webhook(
+            url=config.webhook_url,
+            secret_token=segredo,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        site = web.TCPSite(runner, config.webhook_host, config.webhook_porta)
+        await site.start()
+        logger.info(f"Webhook ouvindo em {config.webhook_host}:{config.webhook_porta}{config.webhook_caminho}")
+
+        await parar.wait()
+        logger.info("Encerrando: recusando novas atualizações e processando as pendentes")
+        servidor.aceitando = False
+        await runner.cleanup()
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def executar_webhook(application: Application, config) -> None:
+    asyncio.run(_executar(application, config))